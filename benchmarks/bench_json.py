@@ -0,0 +1,78 @@
+"""
+Compare JSON backends on a large get_thread_messages payload.
+
+Measures the three hot-path operations per tool call: decoding the API
+response, and encoding tool output in compact and pretty layouts.
+
+Usage:
+    python benchmarks/bench_json.py [--messages 1000] [--body-chars 2000] [--rounds 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from commune_mcp import jsonlib
+
+
+def make_thread(messages: int, body_chars: int) -> dict:
+    """Build a thread-messages envelope shaped like the Commune v1 API."""
+    return {
+        "data": [
+            {
+                "message_id": f"msg_{i:06d}",
+                "thread_id": "thr_bench",
+                "direction": "inbound" if i % 2 else "outbound",
+                "participants": [
+                    {"role": "sender", "identity": f"user{i}@example.com"},
+                    {"role": "to", "identity": "support@example.com"},
+                ],
+                "content": ("Hello — order #4521 still hasn't arrived. " * (body_chars // 42 + 1))[:body_chars],
+                "metadata": {
+                    "subject": "Re: Order not received",
+                    "created_at": "2025-03-10T09:15:00Z",
+                    "attachments": [],
+                    "extracted_data": {"order_id": 4521, "sentiment": "negative", "urgent": True},
+                },
+            }
+            for i in range(messages)
+        ]
+    }
+
+
+def _time(fn, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--body-chars", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    payload = make_thread(args.messages, args.body_chars)
+    jsonlib.use_backend("json")
+    raw = jsonlib.dumps_bytes(payload)
+    print(f"payload: {args.messages} messages, {len(raw) / 1024:.0f} KiB\n")
+    print(f"{'backend':<10}{'decode ms':>12}{'compact ms':>12}{'pretty ms':>12}")
+
+    baseline = None
+    for name in ("json", "orjson", "msgspec"):
+        if jsonlib.use_backend(name) != name:
+            print(f"{name:<10}{'not installed':>36}")
+            continue
+        decode = _time(lambda: jsonlib.loads(raw), args.rounds)
+        compact = _time(lambda: jsonlib.dumps(payload), args.rounds)
+        pretty = _time(lambda: jsonlib.dumps(payload, pretty=True), args.rounds)
+        total = decode + compact
+        baseline = baseline or total
+        print(f"{name:<10}{decode:>12.2f}{compact:>12.2f}{pretty:>12.2f}   ({baseline / total:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+End-to-end MCP benchmark against a local fake Commune API.
+
+Starts benchmarks/fake_api.py, then drives the stdio server
+(`python -m commune_mcp`) and/or the HTTP server (`commune-mcp-http`) with
+concurrent MCP clients and reports throughput, p50/p90/p99 tool latency,
+upstream requests made and the server's RSS.
+
+Usage:
+    python benchmarks/bench_mcp.py --transport both --calls 2000 --concurrency 50
+    python benchmarks/bench_mcp.py --transport http --clients 20 \\
+        --tool get_thread_messages --args '{"thread_id": "thr_000001", "limit": 500}'
+    python benchmarks/bench_mcp.py --latency-ms 50 --error-rate 0.02   # fault injection
+
+Any extra COMMUNE_* variables in the environment are passed to the server.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Optional
+
+import httpx
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+
+HERE = Path(__file__).resolve().parent
+
+DEFAULT_MIX: list[tuple[str, dict[str, Any]]] = [
+    ("get_thread_messages", {"thread_id": "thr_000001", "limit": 50}),
+    ("list_threads", {"inbox_id": "inb_1", "limit": 20}),
+    ("get_thread_metadata", {"thread_id": "thr_000002"}),
+    ("get_deliverability_stats", {"inbox_id": "inb_1"}),
+    ("list_domains", {}),
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _rss_mb(pid: int) -> tuple[Optional[float], Optional[float]]:
+    """Current and peak RSS of a process in MiB (Linux /proc only)."""
+    try:
+        status = Path(f"/proc/{pid}/status").read_text()
+    except OSError:
+        return None, None
+    values = {}
+    for line in status.splitlines():
+        key, _, rest = line.partition(":")
+        if key in ("VmRSS", "VmHWM"):
+            values[key] = int(rest.split()[0]) / 1024
+    return values.get("VmRSS"), values.get("VmHWM")
+
+
+def _find_child(marker: str) -> Optional[int]:
+    """PID of a direct child process whose command line contains `marker`."""
+    me = os.getpid()
+    for entry in Path("/proc").glob("[0-9]*"):
+        try:
+            ppid = int((entry / "stat").read_text().rsplit(")", 1)[1].split()[1])
+            cmdline = (entry / "cmdline").read_bytes().replace(b"\0", b" ").decode()
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == me and marker in cmdline:
+            return int(entry.name)
+    return None
+
+
+async def _wait_http(url: str, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                if (await client.get(url)).status_code < 500:
+                    return
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{url} did not come up within {timeout}s")
+            await asyncio.sleep(0.1)
+
+
+@asynccontextmanager
+async def _process(args: list[str], env: dict[str, str], health_url: str) -> AsyncIterator[subprocess.Popen]:
+    proc = subprocess.Popen(args, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        await _wait_http(health_url)
+        yield proc
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+async def _drive(session: ClientSession, calls: int, concurrency: int, mix: list, latencies: list, errors: list) -> None:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        tool, arguments = mix[i % len(mix)]
+        async with sem:
+            start = time.perf_counter()
+            try:
+                result = await session.call_tool(tool, arguments)
+                if result.isError:
+                    errors.append(tool)
+            except Exception:
+                errors.append(tool)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(i) for i in range(calls)))
+
+
+async def bench_stdio(env: dict[str, str], args: argparse.Namespace, mix: list) -> dict[str, Any]:
+    params = StdioServerParameters(command=sys.executable, args=["-m", "commune_mcp"], env=env)
+    latencies: list[float] = []
+    errors: list[str] = []
+    # Server logs go to /dev/null so they don't skew timing
+    with open(os.devnull, "w") as devnull:
+        async with stdio_client(params, errlog=devnull) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                pid = _find_child("commune_mcp")
+                start = time.perf_counter()
+                await _drive(session, args.calls, args.concurrency, mix, latencies, errors)
+                wall = time.perf_counter() - start
+                rss = _rss_mb(pid) if pid else (None, None)
+    return _summary("stdio", latencies, errors, wall, rss)
+
+
+async def bench_http(env: dict[str, str], args: argparse.Namespace, mix: list) -> dict[str, Any]:
+    port = _free_port()
+    env = {**env, "PORT": str(port)}
+    latencies: list[float] = []
+    errors: list[str] = []
+    url = f"http://127.0.0.1:{port}/?api_key=comm_bench"
+    per_client = max(1, args.calls // args.clients)
+    async with _process([sys.executable, "-m", "commune_mcp.server_http"], env, f"http://127.0.0.1:{port}/health") as proc:
+
+        async def client() -> None:
+            async with streamablehttp_client(url) as (read, write, _):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    await _drive(session, per_client, max(1, args.concurrency // args.clients), mix, latencies, errors)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(args.clients)))
+        wall = time.perf_counter() - start
+        rss = _rss_mb(proc.pid)
+    return _summary("http", latencies, errors, wall, rss)
+
+
+def _summary(name: str, latencies: list[float], errors: list[str], wall: float, rss: tuple) -> dict[str, Any]:
+    ms = sorted(x * 1000 for x in latencies)
+    q = statistics.quantiles(ms, n=100) if len(ms) >= 2 else ms * 99
+    return {
+        "transport": name,
+        "calls": len(ms),
+        "errors": len(errors),
+        "wall_s": round(wall, 3),
+        "calls_per_s": round(len(ms) / wall, 1) if wall else None,
+        "p50_ms": round(q[49], 2),
+        "p90_ms": round(q[89], 2),
+        "p99_ms": round(q[98], 2),
+        "rss_mb": round(rss[0], 1) if rss[0] else None,
+        "peak_rss_mb": round(rss[1], 1) if rss[1] else None,
+    }
+
+
+async def main_async(args: argparse.Namespace) -> list[dict[str, Any]]:
+    mix = [(args.tool, json.loads(args.args))] if args.tool else DEFAULT_MIX
+    api_port = _free_port()
+    api_url = f"http://127.0.0.1:{api_port}"
+    fake_args = [
+        sys.executable, str(HERE / "fake_api.py"), "--port", str(api_port),
+        "--latency-ms", str(args.latency_ms), "--error-rate", str(args.error_rate),
+        "--payment-rate", str(args.payment_rate), "--messages", str(args.messages),
+        "--body-chars", str(args.body_chars),
+    ]
+    env = {**os.environ, "COMMUNE_BASE_URL": api_url, "COMMUNE_API_KEY": "comm_bench"}
+
+    results = []
+    async with _process(fake_args, env, f"{api_url}/__stats"):
+        async with httpx.AsyncClient() as client:
+            for transport in ("stdio", "http") if args.transport == "both" else (args.transport,):
+                before = (await client.get(f"{api_url}/__stats")).json()["requests"]
+                bench = bench_stdio if transport == "stdio" else bench_http
+                result = await bench(env, args, mix)
+                after = (await client.get(f"{api_url}/__stats")).json()["requests"]
+                result["upstream_requests"] = after - before
+                results.append(result)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transport", choices=["stdio", "http", "both"], default="both")
+    parser.add_argument("--calls", type=int, default=1000, help="total tool calls per transport")
+    parser.add_argument("--concurrency", type=int, default=50, help="max concurrent tool calls")
+    parser.add_argument("--clients", type=int, default=10, help="MCP sessions for the HTTP transport")
+    parser.add_argument("--tool", help="benchmark a single tool instead of the default mix")
+    parser.add_argument("--args", default="{}", help="JSON arguments for --tool")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="fake API latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of fake API 503s")
+    parser.add_argument("--payment-rate", type=float, default=0.0, help="fraction of fake API 402s")
+    parser.add_argument("--messages", type=int, default=50, help="messages per thread")
+    parser.add_argument("--body-chars", type=int, default=2000, help="characters per message body")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    columns = ["transport", "calls", "errors", "calls_per_s", "p50_ms", "p90_ms", "p99_ms",
+               "upstream_requests", "rss_mb", "peak_rss_mb"]
+    print("  ".join(f"{c:>17}" for c in columns))
+    for r in results:
+        print("  ".join(f"{str(r.get(c)):>17}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Requests/sec through the API-key middleware: BaseHTTPMiddleware vs pure ASGI.
+
+Builds two otherwise identical Starlette apps — one with the previous
+BaseHTTPMiddleware-based auth middleware, one with the current pure-ASGI
+`_ApiKeyMiddleware` — and drives each in-process (no sockets) with
+concurrent requests against a JSON endpoint and a streaming SSE endpoint.
+
+Usage:
+    python benchmarks/bench_middleware.py [--requests 5000] [--concurrency 50]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import time
+
+import httpx
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from commune_mcp.server import _api_key_ctx
+from commune_mcp.server_http import _ApiKeyMiddleware
+
+
+class _LegacyApiKeyMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware implementation this benchmark compares against."""
+
+    async def dispatch(self, request: Request, call_next):
+        api_key = (
+            request.query_params.get("api_key")
+            or request.headers.get("x-commune-api-key")
+            or request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+        )
+        if not api_key:
+            return JSONResponse({"error": "api_key_required"}, status_code=401)
+        token = _api_key_ctx.set(api_key)
+        try:
+            return await call_next(request)
+        finally:
+            _api_key_ctx.reset(token)
+
+
+async def _json(request: Request):
+    return JSONResponse({"api_key": _api_key_ctx.get()[:4]})
+
+
+async def _sse(request: Request):
+    async def events():
+        for i in range(10):
+            yield f"data: {i}\n\n".encode()
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def _app(middleware: type) -> Starlette:
+    app = Starlette(routes=[Route("/json", _json, methods=["POST"]), Route("/sse", _sse)])
+    app.add_middleware(middleware)
+    return app
+
+
+async def _run(app: Starlette, method: str, path: str, requests: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        sem = asyncio.Semaphore(concurrency)
+
+        async def one() -> None:
+            async with sem:
+                resp = await client.request(method, path, params={"api_key": "comm_bench"})
+                resp.raise_for_status()
+
+        await asyncio.gather(*(one() for _ in range(min(200, requests))))  # warm-up
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        return requests / (time.perf_counter() - start)
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # one log line per request skews timing
+    print(f"{'endpoint':<10}{'BaseHTTPMiddleware':>22}{'pure ASGI':>14}{'speedup':>10}")
+    for method, path in (("POST", "/json"), ("GET", "/sse")):
+        before = await _run(_app(_LegacyApiKeyMiddleware), method, path, args.requests, args.concurrency)
+        after = await _run(_app(_ApiKeyMiddleware), method, path, args.requests, args.concurrency)
+        print(f"{path:<10}{before:>18.0f} r/s{after:>10.0f} r/s{after / before:>9.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
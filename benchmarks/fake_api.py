@@ -0,0 +1,138 @@
+"""
+Local stand-in for the Commune v1 API, for benchmarks.
+
+Serves the endpoints the MCP tools call with synthetic data, plus knobs for
+latency, error injection, 402 Payment Required responses and payload size.
+
+Usage:
+    python benchmarks/fake_api.py --port 9100 --latency-ms 20 --messages 200
+    COMMUNE_BASE_URL=http://127.0.0.1:9100 commune-mcp-http
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+from dataclasses import dataclass
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+
+@dataclass
+class FakeConfig:
+    latency_ms: float = 20.0
+    jitter_ms: float = 5.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    payment_rate: float = 0.0
+    threads: int = 500
+    messages: int = 50
+    body_chars: int = 2000
+
+
+def _thread(i: int) -> dict:
+    return {
+        "thread_id": f"thr_{i:06d}",
+        "subject": f"Order #{4000 + i} not received",
+        "message_count": 3,
+        "last_message_at": f"2025-03-{(i % 28) + 1:02d}T12:00:00Z",
+        "snippet": "Hi, I ordered 5 days ago and still haven't...",
+        "last_direction": "inbound",
+        "has_attachments": False,
+    }
+
+
+def _message(thread_id: str, i: int, body_chars: int) -> dict:
+    return {
+        "message_id": f"msg_{i:06d}",
+        "thread_id": thread_id,
+        "direction": "inbound" if i % 2 else "outbound",
+        "participants": [
+            {"role": "sender", "identity": f"user{i}@example.com"},
+            {"role": "to", "identity": "support@example.com"},
+        ],
+        "content": ("Hello — my order still hasn't arrived. " * (body_chars // 39 + 1))[:body_chars],
+        "metadata": {"subject": "Re: Order not received", "created_at": "2025-03-10T09:15:00Z"},
+    }
+
+
+def create_fake_api(config: FakeConfig) -> Starlette:
+    """Build the fake API app; GET /__stats reports how many requests it served."""
+
+    async def _delay_and_faults() -> Response | None:
+        delay = config.latency_ms + random.uniform(-config.jitter_ms, config.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if config.error_rate and random.random() < config.error_rate:
+            return JSONResponse({"error": "injected"}, status_code=config.error_status)
+        if config.payment_rate and random.random() < config.payment_rate:
+            return JSONResponse(
+                {"accepts": [{"scheme": "exact", "network": "base", "maxAmountRequired": "1000"}]},
+                status_code=402,
+            )
+        return None
+
+    async def handle(request: Request) -> Response:
+        if request.url.path == "/__stats":
+            return JSONResponse({"requests": app.state.requests})
+        app.state.requests += 1
+        fault = await _delay_and_faults()
+        if fault is not None:
+            return fault
+
+        path = request.url.path
+        params = request.query_params
+        if path == "/v1/threads":
+            limit = int(params.get("limit", 20))
+            start = int(params.get("cursor") or 0)
+            end = min(start + limit, config.threads)
+            return JSONResponse({
+                "data": [_thread(i) for i in range(start, end)],
+                "next_cursor": str(end) if end < config.threads else None,
+                "has_more": end < config.threads,
+            })
+        if path.startswith("/v1/threads/") and path.endswith("/messages"):
+            thread_id = path.split("/")[3]
+            limit = min(int(params.get("limit", 50)), config.messages)
+            return JSONResponse({"data": [_message(thread_id, i, config.body_chars) for i in range(limit)]})
+        if path.startswith("/v1/threads/") and path.endswith("/metadata"):
+            return JSONResponse({"data": {"thread_id": path.split("/")[3], "tags": ["vip"], "status": "open", "assigned_to": None}})
+        if path == "/v1/domains":
+            return JSONResponse({"data": [{"id": "dom_1", "name": "example.com", "status": "verified"}]})
+        if path == "/v1/inboxes" or path.endswith("/inboxes"):
+            return JSONResponse({"data": [{"id": "inb_1", "local_part": "support", "domain_id": "dom_1"}]})
+        if path == "/v1/delivery/metrics":
+            return JSONResponse({"data": {"sent": 1000, "delivered": 990, "bounced": 8, "complained": 2}})
+        if request.method in ("POST", "PUT", "DELETE"):
+            return JSONResponse({"data": {"ok": True}})
+        return JSONResponse({"data": {}})
+
+    app = Starlette(routes=[Route("/{path:path}", handle, methods=["GET", "POST", "PUT", "DELETE"])])
+    app.state.requests = 0
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake Commune v1 API for benchmarks")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--payment-rate", type=float, default=0.0)
+    parser.add_argument("--threads", type=int, default=500)
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--body-chars", type=int, default=2000)
+    args = parser.parse_args()
+
+    config = FakeConfig(**{k: v for k, v in vars(args).items() if k != "port"})
+    uvicorn.run(create_fake_api(config), host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Local attachment store: upload dedupe index and download cache.
+
+Both live in one SQLite database under COMMUNE_DATA_DIR:
+
+    uploads    — (tenant, sha256, filename, mime_type) → the upload result,
+                 so re-uploading the same bytes returns the earlier
+                 attachment_id without sending the file again
+    downloads  — attachment_id → a file in downloads/, named by its
+                 SHA-256 so identical attachments are stored once; evicted
+                 least-recently-used once the cache exceeds its size limit
+
+Tenants are identified by a hash of the API key; keys are never written to
+disk. SQLite calls run in a worker thread to keep the event loop free.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Optional
+
+from commune_mcp import jsonlib
+
+
+def tenant_id(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+class AttachmentStore:
+    """Upload dedupe index plus a size-bounded LRU download cache."""
+
+    def __init__(self, directory: str, dedupe_ttl: float = 7 * 86400, cache_max_bytes: int = 512 * 1024 * 1024) -> None:
+        self.directory = directory
+        self.downloads_dir = os.path.join(directory, "downloads")
+        self.dedupe_ttl = dedupe_ttl
+        self.cache_max_bytes = cache_max_bytes
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(self.downloads_dir, exist_ok=True)
+            conn = sqlite3.connect(
+                os.path.join(self.directory, "attachments.db"), check_same_thread=False, isolation_level=None
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS uploads ("
+                " tenant TEXT NOT NULL, sha256 TEXT NOT NULL, filename TEXT NOT NULL, mime_type TEXT NOT NULL,"
+                " result TEXT NOT NULL, created REAL NOT NULL,"
+                " PRIMARY KEY (tenant, sha256, filename, mime_type))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS downloads ("
+                " tenant TEXT NOT NULL, attachment_id TEXT NOT NULL, sha256 TEXT NOT NULL, size INTEGER NOT NULL,"
+                " filename TEXT, mime_type TEXT, last_access REAL NOT NULL,"
+                " PRIMARY KEY (tenant, attachment_id))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS downloads_lru ON downloads (last_access)")
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, fn: Any, *args: Any) -> Any:
+        def call() -> Any:
+            with self._lock:
+                return fn(self._db(), *args)
+
+        return await asyncio.to_thread(call)
+
+    # ── Upload dedupe ────────────────────────────────────────────────────────
+
+    async def lookup_upload(self, tenant: str, sha256: str, filename: str, mime_type: str) -> Optional[dict[str, Any]]:
+        """The earlier upload result for identical content, if still fresh."""
+
+        def query(db: sqlite3.Connection) -> Optional[dict[str, Any]]:
+            row = db.execute(
+                "SELECT result FROM uploads WHERE tenant = ? AND sha256 = ? AND filename = ? AND mime_type = ?"
+                " AND created >= ?",
+                (tenant, sha256, filename, mime_type, time.time() - self.dedupe_ttl),
+            ).fetchone()
+            return jsonlib.loads(row[0]) if row else None
+
+        return await self._run(query)
+
+    async def remember_upload(
+        self, tenant: str, sha256: str, filename: str, mime_type: str, result: dict[str, Any]
+    ) -> None:
+        def insert(db: sqlite3.Connection) -> None:
+            db.execute(
+                "INSERT OR REPLACE INTO uploads VALUES (?, ?, ?, ?, ?, ?)",
+                (tenant, sha256, filename, mime_type, jsonlib.dumps(result), time.time()),
+            )
+
+        await self._run(insert)
+
+    # ── Download cache ───────────────────────────────────────────────────────
+
+    def _blob_path(self, sha256: str) -> str:
+        return os.path.join(self.downloads_dir, sha256)
+
+    def temp_path(self) -> str:
+        """A fresh file in the cache directory to download into."""
+        os.makedirs(self.downloads_dir, exist_ok=True)
+        fd, path = tempfile.mkstemp(prefix=".partial-", dir=self.downloads_dir)
+        os.close(fd)
+        return path
+
+    async def cached_download(self, tenant: str, attachment_id: str) -> Optional[dict[str, Any]]:
+        def query(db: sqlite3.Connection) -> Optional[dict[str, Any]]:
+            row = db.execute(
+                "SELECT sha256, size, filename, mime_type FROM downloads WHERE tenant = ? AND attachment_id = ?",
+                (tenant, attachment_id),
+            ).fetchone()
+            if row is None:
+                return None
+            path = self._blob_path(row[0])
+            if not os.path.exists(path):
+                db.execute("DELETE FROM downloads WHERE tenant = ? AND attachment_id = ?", (tenant, attachment_id))
+                return None
+            db.execute(
+                "UPDATE downloads SET last_access = ? WHERE tenant = ? AND attachment_id = ?",
+                (time.time(), tenant, attachment_id),
+            )
+            return {"path": path, "sha256": row[0], "size_bytes": row[1], "filename": row[2], "mime_type": row[3]}
+
+        return await self._run(query)
+
+    async def store_download(
+        self,
+        tenant: str,
+        attachment_id: str,
+        temp_path: str,
+        sha256: str,
+        size: int,
+        filename: Optional[str],
+        mime_type: Optional[str],
+    ) -> dict[str, Any]:
+        """Move a finished download into the cache, then evict down to the size limit."""
+
+        def insert(db: sqlite3.Connection) -> dict[str, Any]:
+            path = self._blob_path(sha256)
+            os.replace(temp_path, path)  # identical content replaces itself
+            db.execute(
+                "INSERT OR REPLACE INTO downloads VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (tenant, attachment_id, sha256, size, filename, mime_type, time.time()),
+            )
+            self._evict(db, keep=sha256)
+            return {"path": path, "sha256": sha256, "size_bytes": size, "filename": filename, "mime_type": mime_type}
+
+        return await self._run(insert)
+
+    def _evict(self, db: sqlite3.Connection, keep: str) -> None:
+        blobs = db.execute(
+            "SELECT sha256, MAX(size), MAX(last_access) AS used FROM downloads GROUP BY sha256 ORDER BY used"
+        ).fetchall()
+        total = sum(size for _, size, _ in blobs)
+        for sha256, size, _ in blobs:
+            if total <= self.cache_max_bytes:
+                break
+            if sha256 == keep:
+                continue
+            db.execute("DELETE FROM downloads WHERE sha256 = ?", (sha256,))
+            try:
+                os.unlink(self._blob_path(sha256))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,157 @@
+"""
+Circuit breakers around the Commune API, one per endpoint family.
+
+A breaker watches the outcomes of recent calls. Once the error rate over
+its sliding window crosses the threshold it opens, and calls fail
+immediately instead of waiting on a degraded API. After a cool-down it
+half-opens and lets a few probe calls through: success closes it again,
+failure re-opens it.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Any
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Path prefix → endpoint family; first match wins
+FAMILIES = (
+    ("/v1/domains", "domains"),
+    ("/v1/inboxes", "domains"),
+    ("/v1/threads", "threads"),
+    ("/v1/search", "threads"),
+    ("/v1/messages", "messages"),
+    ("/v1/attachments", "messages"),
+    ("/v1/delivery", "delivery"),
+    ("/v1/credits", "credits"),
+)
+
+
+def family_for(path: str) -> str:
+    """Map an API path to its endpoint family."""
+    for prefix, family in FAMILIES:
+        if path.startswith(prefix):
+            return family
+    return "other"
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling an endpoint family whose circuit is open."""
+
+    def __init__(self, family: str, retry_in: float) -> None:
+        self.family = family
+        self.retry_in = retry_in
+        super().__init__(
+            f"Commune API {family} endpoints are failing — circuit open, not calling upstream. "
+            f"Retry in {max(1, round(retry_in))} s."
+        )
+
+
+class CircuitBreaker:
+    """Error-rate circuit breaker with half-open probing."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        min_calls: int = 10,
+        window: float = 30.0,
+        open_for: float = 15.0,
+        probes: int = 1,
+    ) -> None:
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.open_for = open_for
+        self.probes = probes
+        self.state = CLOSED
+        self._outcomes: deque[tuple[float, bool]] = deque()
+        self._opened_at = 0.0
+        self._probing = 0
+        self.opened = 0  # times the circuit has opened, for monitoring
+
+    def _trim(self, now: float) -> None:
+        while self._outcomes and self._outcomes[0][0] < now - self.window:
+            self._outcomes.popleft()
+
+    def before_call(self) -> None:
+        """Admit a call or raise CircuitOpen."""
+        now = time.monotonic()
+        if self.state == OPEN:
+            remaining = self._opened_at + self.open_for - now
+            if remaining > 0:
+                raise CircuitOpen(self.name, remaining)
+            self.state = HALF_OPEN
+            self._probing = 0
+        if self.state == HALF_OPEN:
+            if self._probing >= self.probes:
+                raise CircuitOpen(self.name, self.open_for)
+            self._probing += 1
+
+    def record(self, ok: bool) -> None:
+        """Record the outcome of an admitted call."""
+        now = time.monotonic()
+        if self.state == HALF_OPEN:
+            self._probing = max(0, self._probing - 1)
+            if ok:
+                self.state = CLOSED
+                self._outcomes.clear()
+            else:
+                self._open(now)
+            return
+
+        self._outcomes.append((now, ok))
+        self._trim(now)
+        total = len(self._outcomes)
+        if total >= self.min_calls:
+            failures = sum(1 for _, good in self._outcomes if not good)
+            if failures / total >= self.failure_rate:
+                self._open(now)
+
+    def release(self) -> None:
+        """Return an admitted call that ended without an upstream verdict (e.g. cancelled)."""
+        if self.state == HALF_OPEN:
+            self._probing = max(0, self._probing - 1)
+
+    def _open(self, now: float) -> None:
+        self.state = OPEN
+        self._opened_at = now
+        self._outcomes.clear()
+        self.opened += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        now = time.monotonic()
+        self._trim(now)
+        failures = sum(1 for _, good in self._outcomes if not good)
+        info: dict[str, Any] = {
+            "state": self.state,
+            "recent_calls": len(self._outcomes),
+            "recent_failures": failures,
+            "times_opened": self.opened,
+        }
+        if self.state == OPEN:
+            info["retry_in"] = round(max(0.0, self._opened_at + self.open_for - now), 1)
+        return info
+
+
+class CircuitBreakers:
+    """Lazily created breaker per endpoint family, sharing one configuration."""
+
+    def __init__(self, **config: Any) -> None:
+        self._config = config
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def for_path(self, path: str) -> CircuitBreaker:
+        family = family_for(path)
+        breaker = self._breakers.get(family)
+        if breaker is None:
+            breaker = self._breakers[family] = CircuitBreaker(family, **self._config)
+        return breaker
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        return {name: b.snapshot() for name, b in sorted(self._breakers.items())}
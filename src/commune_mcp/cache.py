@@ -0,0 +1,67 @@
+"""
+In-process TTL cache for slow-changing Commune API reads.
+
+Entries are keyed by (api_key, method, path, params) so tenants sharing one
+HTTP server process never see each other's data. The cache is bounded and
+evicts least-recently-used entries once full.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+CacheKey = tuple[str, str, str, Hashable]
+
+
+def freeze_params(params: Optional[dict[str, Any]]) -> Hashable:
+    """Turn a query-param dict into a hashable, order-independent value."""
+    if not params:
+        return ()
+    return tuple(sorted((k, str(v)) for k, v in params.items()))
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a per-entry TTL."""
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[CacheKey, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: CacheKey) -> tuple[bool, Any]:
+        """Return (hit, value). Expired entries count as misses and are dropped."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def set(self, key: CacheKey, value: Any, ttl: float) -> None:
+        """Store a value for `ttl` seconds, evicting the oldest entries if full."""
+        if self.maxsize <= 0 or ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, api_key: str, *prefixes: str) -> int:
+        """Drop every entry for `api_key` whose path starts with one of `prefixes`."""
+        stale = [
+            key for key in self._entries
+            if key[0] == api_key and key[2].startswith(prefixes)
+        ]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        self._entries.clear()
@@ -0,0 +1,230 @@
+"""
+Resumable event stores for the streamable HTTP transport.
+
+With an event store configured, every SSE event the server sends carries an
+ID; a client whose stream drops reconnects with `Last-Event-ID` and gets the
+events it missed instead of re-running the tool call.
+
+Two backends, both bounded by a TTL and a per-session event cap:
+
+    MemoryEventStore  — ring buffer per session, plus an LRU cap on sessions
+    SQLiteEventStore  — a SQLite file, for large buffers or long TTLs
+
+The SDK shares one EventStore between sessions and uses JSON-RPC request IDs
+as stream IDs, which repeat from session to session. Each session therefore
+gets its own view (`session()`) with a random namespace; event IDs embed that
+namespace, and a view only replays events from its own namespace.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+from mcp.server.streamable_http import EventCallback, EventId, EventMessage, EventStore, StreamId
+from mcp.types import JSONRPCMessage
+
+# (seq, stream_id, serialized message or None for priming events, stored at)
+_Event = tuple[int, str, Optional[str], float]
+
+
+class EventStoreBackend:
+    """Storage shared by all sessions; hands out per-session `EventStore` views."""
+
+    def __init__(self, ttl: float = 300.0, max_events_per_session: int = 1000) -> None:
+        self.ttl = ttl
+        self.max_events_per_session = max_events_per_session
+
+    def session(self) -> SessionEventStore:
+        return SessionEventStore(self, secrets.token_hex(8))
+
+    async def append(self, ns: str, stream_id: str, data: Optional[str]) -> int:
+        raise NotImplementedError
+
+    async def stream_of(self, ns: str, seq: int) -> Optional[str]:
+        """Stream the event belongs to, or None if it expired or never existed."""
+        raise NotImplementedError
+
+    async def after(self, ns: str, stream_id: str, seq: int) -> list[tuple[int, Optional[str]]]:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class SessionEventStore(EventStore):
+    """One MCP session's view of a backend."""
+
+    def __init__(self, backend: EventStoreBackend, ns: str) -> None:
+        self._backend = backend
+        self._ns = ns
+
+    async def store_event(self, stream_id: StreamId, message: JSONRPCMessage | None) -> EventId:
+        data = None if message is None else message.model_dump_json(by_alias=True, exclude_none=True)
+        seq = await self._backend.append(self._ns, stream_id, data)
+        return f"{self._ns}-{seq}"
+
+    async def replay_events_after(self, last_event_id: EventId, send_callback: EventCallback) -> StreamId | None:
+        ns, _, seq_str = last_event_id.partition("-")
+        if ns != self._ns or not seq_str.isdigit():
+            return None
+        seq = int(seq_str)
+        stream_id = await self._backend.stream_of(ns, seq)
+        if stream_id is None:
+            return None
+        for event_seq, data in await self._backend.after(ns, stream_id, seq):
+            if data is not None:  # priming events carry no message
+                await send_callback(EventMessage(JSONRPCMessage.model_validate_json(data), f"{ns}-{event_seq}"))
+        return stream_id
+
+
+class MemoryEventStore(EventStoreBackend):
+    """In-process ring buffers: at most `max_sessions` × `max_events_per_session` events."""
+
+    def __init__(self, ttl: float = 300.0, max_events_per_session: int = 1000, max_sessions: int = 1000) -> None:
+        super().__init__(ttl, max_events_per_session)
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict[str, deque[_Event]] = OrderedDict()
+        self._seq = 0
+        self._next_sweep = 0.0
+
+    def _expire(self, now: float) -> None:
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + min(self.ttl, 60.0)
+        cutoff = now - self.ttl
+        for ns in list(self._sessions):
+            events = self._sessions[ns]
+            while events and events[0][3] < cutoff:
+                events.popleft()
+            if not events:
+                del self._sessions[ns]
+
+    async def append(self, ns: str, stream_id: str, data: Optional[str]) -> int:
+        now = time.monotonic()
+        self._expire(now)
+        events = self._sessions.get(ns)
+        if events is None:
+            events = self._sessions[ns] = deque(maxlen=self.max_events_per_session)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(ns)
+        self._seq += 1
+        events.append((self._seq, stream_id, data, now))
+        return self._seq
+
+    def _live(self, ns: str) -> list[_Event]:
+        cutoff = time.monotonic() - self.ttl
+        return [e for e in self._sessions.get(ns, ()) if e[3] >= cutoff]
+
+    async def stream_of(self, ns: str, seq: int) -> Optional[str]:
+        return next((e[1] for e in self._live(ns) if e[0] == seq), None)
+
+    async def after(self, ns: str, stream_id: str, seq: int) -> list[tuple[int, Optional[str]]]:
+        return [(e[0], e[2]) for e in self._live(ns) if e[0] > seq and e[1] == stream_id]
+
+    def __len__(self) -> int:
+        return sum(len(events) for events in self._sessions.values())
+
+
+class SQLiteEventStore(EventStoreBackend):
+    """Events in a SQLite file; queries run in a worker thread to keep the loop free."""
+
+    # Sweep expired rows every N inserts rather than on each one
+    PRUNE_EVERY = 100
+
+    def __init__(self, path: str, ttl: float = 300.0, max_events_per_session: int = 1000) -> None:
+        super().__init__(ttl, max_events_per_session)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._inserts = 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                " seq INTEGER PRIMARY KEY AUTOINCREMENT, ns TEXT NOT NULL, stream_id TEXT NOT NULL,"
+                " data TEXT, created REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS events_ns ON events (ns, seq)")
+            conn.execute("CREATE INDEX IF NOT EXISTS events_ns_stream ON events (ns, stream_id, seq)")
+            conn.execute("CREATE INDEX IF NOT EXISTS events_created ON events (created)")
+            self._conn = conn
+        return self._conn
+
+    def _append(self, ns: str, stream_id: str, data: Optional[str]) -> int:
+        with self._lock:
+            db = self._db()
+            seq = db.execute(
+                "INSERT INTO events (ns, stream_id, data, created) VALUES (?, ?, ?, ?)",
+                (ns, stream_id, data, time.time()),
+            ).lastrowid
+            self._inserts += 1
+            if self._inserts % self.PRUNE_EVERY == 0:
+                db.execute("DELETE FROM events WHERE created < ?", (time.time() - self.ttl,))
+            # Per-session cap: drop this session's events older than the newest N
+            db.execute(
+                "DELETE FROM events WHERE ns = ? AND seq <= "
+                "(SELECT seq FROM events WHERE ns = ? ORDER BY seq DESC LIMIT 1 OFFSET ?)",
+                (ns, ns, self.max_events_per_session),
+            )
+            return seq
+
+    def _query(self, sql: str, params: tuple) -> list[tuple]:
+        with self._lock:
+            return self._db().execute(sql, params).fetchall()
+
+    async def append(self, ns: str, stream_id: str, data: Optional[str]) -> int:
+        return await asyncio.to_thread(self._append, ns, stream_id, data)
+
+    async def stream_of(self, ns: str, seq: int) -> Optional[str]:
+        rows = await asyncio.to_thread(
+            self._query,
+            "SELECT stream_id FROM events WHERE ns = ? AND seq = ? AND created >= ?",
+            (ns, seq, time.time() - self.ttl),
+        )
+        return rows[0][0] if rows else None
+
+    async def after(self, ns: str, stream_id: str, seq: int) -> list[tuple[int, Optional[str]]]:
+        return await asyncio.to_thread(
+            self._query,
+            "SELECT seq, data FROM events WHERE ns = ? AND stream_id = ? AND seq > ? AND created >= ? ORDER BY seq",
+            (ns, stream_id, seq, time.time() - self.ttl),
+        )
+
+    async def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def from_env(data_dir: str) -> Optional[EventStoreBackend]:
+    """Build the backend selected by COMMUNE_MCP_EVENT_STORE (memory, sqlite, or unset for none).
+
+    The SQLite database defaults to `events.db` in `data_dir` (COMMUNE_DATA_DIR).
+    """
+    kind = os.environ.get("COMMUNE_MCP_EVENT_STORE", "").lower()
+    ttl = float(os.environ.get("COMMUNE_MCP_EVENT_TTL", "300"))
+    per_session = int(os.environ.get("COMMUNE_MCP_EVENT_MAX_PER_SESSION", "1000"))
+    if kind in ("", "none"):
+        return None
+    if kind == "memory":
+        max_sessions = int(os.environ.get("COMMUNE_MCP_EVENT_MAX_SESSIONS", "1000"))
+        return MemoryEventStore(ttl, per_session, max_sessions)
+    if kind == "sqlite":
+        path = os.environ.get("COMMUNE_MCP_EVENT_DB") or os.path.join(data_dir, "events.db")
+        return SQLiteEventStore(path, ttl, per_session)
+    raise ValueError(f"Unknown COMMUNE_MCP_EVENT_STORE {kind!r} — expected memory or sqlite")
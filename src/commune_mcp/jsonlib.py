@@ -0,0 +1,113 @@
+"""
+Pluggable JSON backend.
+
+Uses orjson or msgspec when installed (`pip install commune-mcp[speedups]`)
+and falls back to the stdlib json module otherwise. Select explicitly with
+COMMUNE_JSON_BACKEND=orjson|msgspec|json; the default, "auto", picks the
+fastest available.
+
+Every encode/decode on the hot path — request bodies, API responses, tool
+output and the SQLite stores' JSON columns — goes through `loads`, `dumps`
+and `dumps_bytes`.
+
+Values JSON has no type for are encoded with `str()`, as the stdlib backend
+does: orjson is told to pass datetimes through to that fallback instead of
+writing its own RFC 3339 form. msgspec has no such option and writes
+datetimes as RFC 3339 ("2025-01-01T00:00:00Z" rather than
+"2025-01-01 00:00:00+00:00").
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Callable
+
+_PREFERENCE = ("orjson", "msgspec", "json")
+
+
+def _stdlib() -> tuple[Callable[[bytes | str], Any], Callable[[Any, bool], bytes]]:
+    def _loads(data: bytes | str) -> Any:
+        return json.loads(data)
+
+    def _dumps(obj: Any, pretty: bool) -> bytes:
+        if pretty:
+            return json.dumps(obj, indent=2, default=str).encode()
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str).encode()
+
+    return _loads, _dumps
+
+
+def _orjson() -> tuple[Callable[[bytes | str], Any], Callable[[Any, bool], bytes]]:
+    import orjson
+
+    _, std_dumps = _stdlib()
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME  # datetimes via default=str, like stdlib
+
+    def _dumps(obj: Any, pretty: bool) -> bytes:
+        try:
+            return orjson.dumps(
+                obj, default=str, option=options | (orjson.OPT_INDENT_2 if pretty else 0)
+            )
+        except TypeError:
+            return std_dumps(obj, pretty)  # e.g. ints beyond 64 bits
+
+    return orjson.loads, _dumps
+
+
+def _msgspec() -> tuple[Callable[[bytes | str], Any], Callable[[Any, bool], bytes]]:
+    import msgspec
+
+    _, std_dumps = _stdlib()
+    encoder = msgspec.json.Encoder(enc_hook=str)
+    decoder = msgspec.json.Decoder()
+
+    def _dumps(obj: Any, pretty: bool) -> bytes:
+        try:
+            raw = encoder.encode(obj)
+        except (TypeError, msgspec.EncodeError):
+            return std_dumps(obj, pretty)
+        return msgspec.json.format(raw, indent=2) if pretty else raw
+
+    return decoder.decode, _dumps
+
+
+_LOADERS = {"orjson": _orjson, "msgspec": _msgspec, "json": _stdlib}
+
+
+def _select(name: str) -> tuple[str, Callable[[bytes | str], Any], Callable[[Any, bool], bytes]]:
+    candidates = _PREFERENCE if name == "auto" else (name, "json")
+    for candidate in candidates:
+        loader = _LOADERS.get(candidate)
+        if loader is None:
+            raise ValueError(f"Unknown COMMUNE_JSON_BACKEND {name!r} — expected auto, orjson, msgspec or json")
+        try:
+            return (candidate, *loader())
+        except ImportError:
+            continue
+    return ("json", *_stdlib())
+
+
+BACKEND, _loads, _dumps = _select(os.environ.get("COMMUNE_JSON_BACKEND", "auto").lower())
+
+
+def use_backend(name: str) -> str:
+    """Switch the JSON backend at runtime and return the one actually selected."""
+    global BACKEND, _loads, _dumps
+    BACKEND, _loads, _dumps = _select(name.lower())
+    return BACKEND
+
+
+def loads(data: bytes | str) -> Any:
+    """Decode JSON from bytes or str."""
+    return _loads(data)
+
+
+def dumps_bytes(obj: Any, pretty: bool = False) -> bytes:
+    """Encode JSON to UTF-8 bytes (compact unless `pretty`)."""
+    return _dumps(obj, pretty)
+
+
+def dumps(obj: Any, pretty: bool = False) -> str:
+    """Encode JSON to str (compact unless `pretty`)."""
+    return _dumps(obj, pretty).decode()
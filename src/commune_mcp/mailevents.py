@@ -0,0 +1,169 @@
+"""
+New-mail events: webhook verification and an in-process event feed.
+
+Commune signs each webhook delivery with HMAC-SHA256 over
+`"{timestamp}.{raw body}"`, sent as `X-Commune-Signature: v1=<hex>` along
+with `X-Commune-Timestamp` (Unix seconds). `verify_signature` checks it
+against one or more secrets, so a secret can be rotated without dropping
+events, and rejects stale timestamps to stop replays.
+
+`MailFeed` keeps the last few events per inbox and wakes tools waiting on
+an inbox when a new one arrives. Cursors name a position in the feed; they
+embed a per-process ID, so a cursor from before a restart replays whatever
+the new process has buffered instead of silently skipping events.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import secrets
+import time
+from collections import OrderedDict, deque
+from typing import Any, Optional
+
+SIGNATURE_HEADER = "x-commune-signature"
+TIMESTAMP_HEADER = "x-commune-timestamp"
+
+
+class InvalidSignature(ValueError):
+    pass
+
+
+def verify_signature(
+    keys: list[str],
+    body: bytes,
+    timestamp: Optional[str],
+    signature: Optional[str],
+    tolerance: float = 300.0,
+) -> None:
+    """Raise InvalidSignature unless `signature` is a fresh signature of `body` by one of `keys`."""
+    if not timestamp or not signature:
+        raise InvalidSignature("missing signature or timestamp header")
+    try:
+        sent = float(timestamp)
+    except ValueError:
+        raise InvalidSignature("malformed timestamp") from None
+    if sent > 1e12:  # milliseconds
+        sent /= 1000
+    if abs(time.time() - sent) > tolerance:
+        raise InvalidSignature("timestamp outside the allowed window")
+
+    signed = timestamp.encode() + b"." + body
+    given = [part.strip().removeprefix("v1=") for part in signature.split(",")]
+    for secret in keys:
+        expected = hmac.new(secret.encode(), signed, hashlib.sha256).hexdigest()
+        if any(hmac.compare_digest(expected, g) for g in given):
+            return
+    raise InvalidSignature("signature mismatch")
+
+
+def _pick(payload: dict[str, Any], *names: str) -> Optional[str]:
+    """First of `names` found at the top level, in `data`, or in `data.message`."""
+    data = payload.get("data") if isinstance(payload.get("data"), dict) else {}
+    message = data.get("message") if isinstance(data.get("message"), dict) else {}
+    for scope in (payload, data, message):
+        for name in names:
+            if scope.get(name):
+                return str(scope[name])
+    return None
+
+
+def parse_event(payload: dict[str, Any]) -> Optional[dict[str, Any]]:
+    """Normalize a webhook payload; None if it names no inbox."""
+    inbox_id = _pick(payload, "inbox_id", "inboxId")
+    if inbox_id is None:
+        return None
+    data = payload.get("data") if isinstance(payload.get("data"), dict) else {}
+    message = data.get("message") if isinstance(data.get("message"), dict) else data
+    metadata = message.get("metadata") if isinstance(message.get("metadata"), dict) else {}
+    sender = next(
+        (p.get("identity") for p in message.get("participants") or [] if isinstance(p, dict) and p.get("role") == "sender"),
+        message.get("from"),
+    )
+    return {
+        "event_id": _pick(payload, "event_id", "id"),
+        "type": payload.get("type") or payload.get("event") or "message.received",
+        "inbox_id": inbox_id,
+        "thread_id": _pick(payload, "thread_id", "threadId"),
+        "message_id": _pick(payload, "message_id", "messageId"),
+        "from": sender,
+        "subject": metadata.get("subject") or message.get("subject"),
+        "created_at": metadata.get("created_at") or message.get("created_at") or payload.get("created_at"),
+    }
+
+
+class MailFeed:
+    """The most recent events per inbox, with waiters woken on publish."""
+
+    def __init__(self, max_events_per_inbox: int = 100, max_inboxes: int = 10000) -> None:
+        self.max_events_per_inbox = max_events_per_inbox
+        self.max_inboxes = max_inboxes
+        self._epoch = secrets.token_hex(4)
+        self._seq = 0
+        self._inboxes: OrderedDict[str, deque[tuple[int, dict[str, Any]]]] = OrderedDict()
+        self._signals: dict[str, asyncio.Event] = {}
+        self._seen: OrderedDict[str, None] = OrderedDict()
+
+    def cursor(self, seq: Optional[int] = None) -> str:
+        return f"{self._epoch}-{self._seq if seq is None else seq}"
+
+    def _position(self, cursor: Optional[str]) -> int:
+        if cursor is None:
+            return self._seq
+        epoch, _, seq = cursor.partition("-")
+        if epoch != self._epoch or not seq.isdigit():
+            return 0  # from another process: replay what is buffered
+        return int(seq)
+
+    def publish(self, inbox_id: str, event: dict[str, Any]) -> bool:
+        """Record an event and wake its waiters; False for a redelivered event_id."""
+        event_id = event.get("event_id")
+        if event_id:
+            if event_id in self._seen:
+                return False
+            self._seen[event_id] = None
+            while len(self._seen) > self.max_inboxes * 10:
+                self._seen.popitem(last=False)
+        events = self._inboxes.get(inbox_id)
+        if events is None:
+            events = self._inboxes[inbox_id] = deque(maxlen=self.max_events_per_inbox)
+            while len(self._inboxes) > self.max_inboxes:
+                self._inboxes.popitem(last=False)
+        else:
+            self._inboxes.move_to_end(inbox_id)
+        self._seq += 1
+        events.append((self._seq, event))
+        signal = self._signals.pop(inbox_id, None)
+        if signal is not None:
+            signal.set()
+        return True
+
+    def since(self, inbox_id: str, cursor: Optional[str]) -> tuple[list[dict[str, Any]], str]:
+        """Events for `inbox_id` after `cursor`, and the cursor to continue from."""
+        after = self._position(cursor)
+        events = [e for seq, e in self._inboxes.get(inbox_id, ()) if seq > after]
+        return events, self.cursor()
+
+    async def wait(
+        self, inbox_id: str, cursor: Optional[str], timeout: float
+    ) -> tuple[list[dict[str, Any]], str]:
+        """Like `since`, but wait up to `timeout` seconds for an event if there are none yet."""
+        position = self.cursor(self._position(cursor))
+        deadline = time.monotonic() + timeout
+        while True:
+            events, next_cursor = self.since(inbox_id, position)
+            remaining = deadline - time.monotonic()
+            if events or remaining <= 0:
+                return events, next_cursor
+            signal = self._signals.setdefault(inbox_id, asyncio.Event())
+            try:
+                await asyncio.wait_for(signal.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    def clear(self) -> None:
+        self._inboxes.clear()
+        self._signals.clear()
+        self._seen.clear()
@@ -0,0 +1,263 @@
+"""
+Mail merge: templates, recipient lists and resumable bulk send jobs.
+
+Templates use `{{name}}` placeholders, filled from each recipient's
+variables (dotted names reach into nested JSON objects). Recipients come
+from a JSON array, JSON Lines or CSV with a header row; each needs an
+`email` (or `to`) field.
+
+`BulkJobStore` persists every job and the state of each recipient in
+SQLite, so a send interrupted by a restart or a client timeout can be
+resumed without emailing anyone twice. A recipient is marked `sending`
+before its request goes out; after a crash such recipients are reported
+as uncertain and only resent on request.
+
+A job is sent by one owner at a time: `claim` takes it atomically in the
+database, so workers sharing COMMUNE_DATA_DIR cannot run it twice. The
+owner refreshes a heartbeat while sending; a job whose heartbeat is older
+than `stale_after` seconds (its worker died) can be claimed again.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import html
+import io
+import os
+import re
+import secrets
+import sqlite3
+import threading
+import time
+from typing import Any, Optional, Union
+
+from commune_mcp import jsonlib
+
+PLACEHOLDER = re.compile(r"\{\{\s*([\w.-]+)\s*\}\}")
+
+PENDING, SENDING, SENT, FAILED = "pending", "sending", "sent", "failed"
+
+
+class MissingVariable(ValueError):
+    pass
+
+
+def _lookup(variables: dict[str, Any], name: str) -> Any:
+    value: Any = variables
+    for part in name.split("."):
+        if not isinstance(value, dict) or part not in value:
+            raise MissingVariable(f"no value for {{{{{name}}}}}")
+        value = value[part]
+    return value
+
+
+def render(template: str, variables: dict[str, Any], escape: bool = False) -> str:
+    """Fill `{{name}}` placeholders; `escape` HTML-escapes the values."""
+
+    def sub(match: re.Match[str]) -> str:
+        value = _lookup(variables, match.group(1))
+        text = "" if value is None else str(value)
+        return html.escape(text) if escape else text
+
+    return PLACEHOLDER.sub(sub, template)
+
+
+def _decode(data: str, fmt: Optional[str]) -> list[Any]:
+    data = data.lstrip("\ufeff").strip()
+    if fmt is None:
+        fmt = "json" if data.startswith("[") else "jsonl" if data.startswith("{") else "csv"
+    if fmt == "json":
+        rows = jsonlib.loads(data)
+        if not isinstance(rows, list):
+            raise ValueError("recipients JSON must be an array")
+        return rows
+    if fmt == "jsonl":
+        return [jsonlib.loads(line) for line in data.splitlines() if line.strip()]
+    if fmt == "csv":
+        return list(csv.DictReader(io.StringIO(data)))
+    raise ValueError(f"Unknown recipients format {fmt!r} — expected json, jsonl or csv")
+
+
+def parse_recipients(data: Union[str, dict[str, Any], list[Any]], fmt: Optional[str] = None) -> list[dict[str, Any]]:
+    """Parse recipients from JSON (array), JSONL or CSV text, or already-decoded JSON.
+
+    `fmt` is "json", "jsonl" or "csv"; when omitted it is guessed from the
+    first character. Plain address strings in a JSON array are accepted too,
+    and a single object counts as one recipient.
+    """
+    if isinstance(data, dict):
+        rows = [data]
+    elif isinstance(data, list):
+        rows = data
+    else:
+        rows = _decode(data, fmt)
+
+    recipients = []
+    for i, row in enumerate(rows, 1):
+        if isinstance(row, str):
+            row = {"email": row}
+        if not isinstance(row, dict):
+            raise ValueError(f"recipient {i} is not an object")
+        email = str(row.get("email") or row.get("to") or "").strip()
+        if not email:
+            raise ValueError(f"recipient {i} has no email")
+        recipients.append({**row, "email": email})
+    return recipients
+
+
+def read_recipients_file(path: str) -> list[dict[str, Any]]:
+    ext = os.path.splitext(path)[1].lower()
+    fmt = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".json": "json"}.get(ext)
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        return parse_recipients(f.read(), fmt)
+
+
+class BulkJobStore:
+    """Bulk send jobs and per-recipient status in SQLite."""
+
+    def __init__(self, path: str, stale_after: float = 60.0) -> None:
+        self.path = path
+        self.stale_after = stale_after
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " job_id TEXT PRIMARY KEY, tenant TEXT NOT NULL, spec TEXT NOT NULL, created REAL NOT NULL,"
+                " owner TEXT, heartbeat REAL)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "owner" not in columns:  # databases created before job ownership
+                conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+                conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat REAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS recipients ("
+                " job_id TEXT NOT NULL, idx INTEGER NOT NULL, email TEXT NOT NULL, variables TEXT NOT NULL,"
+                " status TEXT NOT NULL, message_id TEXT, error TEXT, PRIMARY KEY (job_id, idx))"
+            )
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, fn: Any, *args: Any) -> Any:
+        def call() -> Any:
+            with self._lock:
+                return fn(self._db(), *args)
+
+        return await asyncio.to_thread(call)
+
+    async def create(self, tenant: str, spec: dict[str, Any], recipients: list[dict[str, Any]], owner: str) -> str:
+        """Store a new job, already claimed by `owner`."""
+        job_id = f"bulk_{secrets.token_urlsafe(12)}"
+
+        def insert(db: sqlite3.Connection) -> None:
+            now = time.time()
+            db.execute("BEGIN")
+            db.execute(
+                "INSERT INTO jobs VALUES (?, ?, ?, ?, ?, ?)", (job_id, tenant, jsonlib.dumps(spec), now, owner, now)
+            )
+            db.executemany(
+                "INSERT INTO recipients (job_id, idx, email, variables, status) VALUES (?, ?, ?, ?, ?)",
+                [(job_id, i, r["email"], jsonlib.dumps(r), PENDING) for i, r in enumerate(recipients)],
+            )
+            db.execute("COMMIT")
+
+        await self._run(insert)
+        return job_id
+
+    async def spec(self, tenant: str, job_id: str) -> Optional[dict[str, Any]]:
+        def query(db: sqlite3.Connection) -> Optional[dict[str, Any]]:
+            row = db.execute("SELECT spec FROM jobs WHERE job_id = ? AND tenant = ?", (job_id, tenant)).fetchone()
+            return jsonlib.loads(row[0]) if row else None
+
+        return await self._run(query)
+
+    async def claim(self, job_id: str, owner: str) -> bool:
+        """Take the job for `owner`; False while another owner's heartbeat is fresh."""
+
+        def update(db: sqlite3.Connection) -> bool:
+            now = time.time()
+            return db.execute(
+                "UPDATE jobs SET owner = ?, heartbeat = ? WHERE job_id = ?"
+                " AND (owner IS NULL OR owner = ? OR heartbeat < ?)",
+                (owner, now, job_id, owner, now - self.stale_after),
+            ).rowcount == 1
+
+        return await self._run(update)
+
+    async def heartbeat(self, job_id: str, owner: str) -> None:
+        def update(db: sqlite3.Connection) -> None:
+            db.execute("UPDATE jobs SET heartbeat = ? WHERE job_id = ? AND owner = ?", (time.time(), job_id, owner))
+
+        await self._run(update)
+
+    async def release(self, job_id: str, owner: str) -> None:
+        def update(db: sqlite3.Connection) -> None:
+            db.execute("UPDATE jobs SET owner = NULL, heartbeat = NULL WHERE job_id = ? AND owner = ?", (job_id, owner))
+
+        await self._run(update)
+
+    async def todo(self, job_id: str, statuses: tuple[str, ...]) -> list[tuple[int, dict[str, Any]]]:
+        """Recipients in any of `statuses`, in list order."""
+
+        def query(db: sqlite3.Connection) -> list[tuple[int, dict[str, Any]]]:
+            marks = ",".join("?" * len(statuses))
+            rows = db.execute(
+                f"SELECT idx, variables FROM recipients WHERE job_id = ? AND status IN ({marks}) ORDER BY idx",
+                (job_id, *statuses),
+            ).fetchall()
+            return [(idx, jsonlib.loads(variables)) for idx, variables in rows]
+
+        return await self._run(query)
+
+    async def mark(
+        self, job_id: str, idx: int, status: str, message_id: Optional[str] = None, error: Optional[str] = None
+    ) -> None:
+        def update(db: sqlite3.Connection) -> None:
+            db.execute(
+                "UPDATE recipients SET status = ?, message_id = ?, error = ? WHERE job_id = ? AND idx = ?",
+                (status, message_id, error, job_id, idx),
+            )
+
+        await self._run(update)
+
+    async def summary(self, job_id: str, max_failures: int = 100) -> dict[str, Any]:
+        def query(db: sqlite3.Connection) -> dict[str, Any]:
+            counts = dict(
+                db.execute("SELECT status, COUNT(*) FROM recipients WHERE job_id = ? GROUP BY status", (job_id,))
+            )
+            failures = db.execute(
+                "SELECT email, error FROM recipients WHERE job_id = ? AND status = ? ORDER BY idx LIMIT ?",
+                (job_id, FAILED, max_failures),
+            ).fetchall()
+            uncertain = db.execute(
+                "SELECT email FROM recipients WHERE job_id = ? AND status = ? ORDER BY idx LIMIT ?",
+                (job_id, SENDING, max_failures),
+            ).fetchall()
+            total = sum(counts.values())
+            heartbeat = db.execute("SELECT heartbeat FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            return {
+                "job_id": job_id,
+                "total": total,
+                "sent": counts.get(SENT, 0),
+                "pending": counts.get(PENDING, 0),
+                "failed_count": counts.get(FAILED, 0),
+                "failed": [{"email": email, "error": error} for email, error in failures],
+                "uncertain": [email for (email,) in uncertain],
+                "complete": counts.get(SENT, 0) == total,
+                "running": bool(heartbeat and heartbeat[0] and heartbeat[0] >= time.time() - self.stale_after),
+            }
+
+        return await self._run(query)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,254 @@
+"""
+Prometheus metrics with no third-party dependency.
+
+Keeps counters, gauges and histograms in plain dicts and renders them in
+the Prometheus text exposition format for the HTTP server's /metrics
+route. Every MCP tool is wrapped by `instrument_tool`, which records call
+counts, errors and latency split into upstream time (awaiting the Commune
+API) and local overhead (validation, formatting, caching).
+"""
+
+from __future__ import annotations
+
+import bisect
+import contextvars
+import functools
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Iterable, Iterator, Optional
+
+import httpx
+
+from commune_mcp.breaker import CircuitOpen
+from commune_mcp.ratelimit import RateLimited
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Sample = tuple[str, dict[str, str], float]
+# (name, type, help, [(labels, value), ...]) produced by a scrape-time collector
+Collected = tuple[str, str, str, Iterable[tuple[dict[str, str], float]]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _fmt_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+
+    def samples(self) -> Iterator[Sample]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()) -> None:
+        super().__init__(name, help, labels)
+        # Unlabelled metrics start at 0 so they are exported before the first event
+        self._values: dict[tuple[str, ...], float] = {} if self.labels else {(): 0.0}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def samples(self) -> Iterator[Sample]:
+        for values, v in sorted(self._values.items()):
+            yield self.name, dict(zip(self.labels, values)), v
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labelvalues: str, amount: float = 1.0) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, *labelvalues: str, value: float) -> None:
+        self._values[labelvalues] = value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Iterable[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # labelvalues → [per-bucket counts..., +Inf count, sum]
+        self._values: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        row = self._values.get(labelvalues)
+        if row is None:
+            row = self._values[labelvalues] = [0.0] * (len(self.buckets) + 2)
+        row[bisect.bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    def samples(self) -> Iterator[Sample]:
+        for values, row in sorted(self._values.items()):
+            labels = dict(zip(self.labels, values))
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, float("inf")), row[:-1]):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": _fmt_value(bound)}, cumulative
+            yield f"{self.name}_count", labels, cumulative
+            yield f"{self.name}_sum", labels, row[-1]
+
+
+class Registry:
+    """Holds metrics plus collectors that read live state at scrape time."""
+
+    def __init__(self) -> None:
+        self._metrics: list[_Metric] = []
+        self._collectors: list[Callable[[], Iterable[Collected]]] = []
+
+    def register(self, metric: Any) -> Any:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, fn: Callable[[], Iterable[Collected]]) -> None:
+        """Add a callback yielding (name, type, help, [(labels, value), ...])."""
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for m in self._metrics:
+            lines += [f"# HELP {m.name} {m.help}", f"# TYPE {m.name} {m.type}"]
+            lines += [f"{n}{_fmt_labels(l)} {_fmt_value(v)}" for n, l, v in m.samples()]
+        for collect in self._collectors:
+            for name, type_, help_, samples in collect():
+                lines += [f"# HELP {name} {help_}", f"# TYPE {name} {type_}"]
+                lines += [f"{name}{_fmt_labels(l)} {_fmt_value(v)}" for l, v in samples]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+TOOL_CALLS = REGISTRY.register(Counter(
+    "commune_mcp_tool_calls_total", "MCP tool calls.", ["tool"]))
+TOOL_ERRORS = REGISTRY.register(Counter(
+    "commune_mcp_tool_errors_total", "MCP tool calls that failed, by upstream status code or error kind.", ["tool", "status"]))
+TOOL_LATENCY = REGISTRY.register(Histogram(
+    "commune_mcp_tool_duration_seconds", "Total MCP tool call latency.", ["tool"]))
+TOOL_UPSTREAM = REGISTRY.register(Histogram(
+    "commune_mcp_tool_upstream_seconds", "Wall time a tool call had Commune API requests in flight.", ["tool"]))
+TOOL_OVERHEAD = REGISTRY.register(Histogram(
+    "commune_mcp_tool_overhead_seconds", "Tool call latency not spent awaiting the Commune API.", ["tool"]))
+TOOLS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "commune_mcp_tools_in_flight", "MCP tool calls currently running.", ["tool"]))
+X402_RETRIES = REGISTRY.register(Counter(
+    "commune_mcp_x402_payment_retries_total", "Requests retried with an x402 payment signature after a 402."))
+
+class _UpstreamClock:
+    """Wall time during which at least one Commune API request was in flight.
+
+    Concurrent requests (bulk fan-out, page prefetch) overlap, so summing
+    their durations would exceed the tool's own latency; only the union of
+    their intervals counts.
+    """
+
+    __slots__ = ("in_flight", "busy_since", "seconds")
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.busy_since = 0.0
+        self.seconds = 0.0
+
+    def start(self) -> None:
+        if self.in_flight == 0:
+            self.busy_since = time.perf_counter()
+        self.in_flight += 1
+
+    def stop(self) -> None:
+        self.in_flight -= 1
+        if self.in_flight == 0:
+            self.seconds += time.perf_counter() - self.busy_since
+
+    def total(self) -> float:
+        """Upstream seconds so far, including requests still in flight."""
+        if self.in_flight:
+            return self.seconds + time.perf_counter() - self.busy_since
+        return self.seconds
+
+
+# Upstream time of the current tool call
+_upstream_clock: contextvars.ContextVar[Optional[_UpstreamClock]] = contextvars.ContextVar(
+    "commune_upstream_clock", default=None
+)
+
+
+@contextmanager
+def upstream_timer() -> Iterator[None]:
+    """Attribute the time spent in the block to the current tool's upstream time."""
+    clock = _upstream_clock.get()
+    if clock is None:
+        yield
+        return
+    clock.start()
+    try:
+        yield
+    finally:
+        clock.stop()
+
+
+def error_status(exc: BaseException) -> str:
+    """Label value describing why a tool call failed."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return str(exc.response.status_code)
+    if isinstance(exc, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(exc, httpx.TransportError):
+        return "transport"
+    if isinstance(exc, RateLimited):
+        return "rate_limited"
+    if isinstance(exc, CircuitOpen):
+        return "circuit_open"
+    return "error"
+
+
+def instrument_tool(name: str, fn: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """Wrap an async tool function with call, error and latency metrics."""
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        clock = _UpstreamClock()
+        token = _upstream_clock.set(clock)
+        TOOL_CALLS.inc(name)
+        TOOLS_IN_FLIGHT.inc(name)
+        start = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        except Exception as exc:
+            TOOL_ERRORS.inc(name, error_status(exc))
+            raise
+        finally:
+            total = time.perf_counter() - start
+            TOOLS_IN_FLIGHT.dec(name)
+            _upstream_clock.reset(token)
+            upstream = min(clock.total(), total)
+            TOOL_LATENCY.observe(total, name)
+            TOOL_UPSTREAM.observe(upstream, name)
+            TOOL_OVERHEAD.observe(total - upstream, name)
+
+    return wrapper
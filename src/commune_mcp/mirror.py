@@ -0,0 +1,315 @@
+"""
+Local thread mirror with full-text search.
+
+An optional copy of threads and messages per inbox in SQLite, kept current
+by incremental syncs, so searches are answered locally instead of through
+`/v1/search/threads`. Message subjects, bodies and senders are indexed with
+FTS5 (porter stemming, diacritics folded).
+
+    threads     — one row per thread; `last_message_at` is the version a
+                  sync compares against to skip unchanged threads
+    messages    — one row per message, plus the `messages_fts` index kept
+                  in step by triggers
+    sync_state  — per inbox: when it was last fully synced, the cursor to
+                  resume an initial backfill and the cursors to resume
+                  incremental catch-ups that ran out of page budget, and
+                  threads whose messages failed to load
+
+Rows are scoped to a tenant (a hash of the API key, see attachments). The
+sync itself lives with the tools in server.py; this module only stores and
+queries. SQLite calls run in a worker thread to keep the event loop free.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from commune_mcp import jsonlib
+
+_TAG = re.compile(r"<[^>]+>")
+_SPACE = re.compile(r"\s+")
+_TERM = re.compile(r'[^\s"]+\*?')
+
+
+def _epoch(value: Any) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        ts = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return (ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)).timestamp()
+
+
+def _sender(message: dict[str, Any]) -> str:
+    for p in message.get("participants") or []:
+        if isinstance(p, dict) and p.get("role") in ("sender", "from"):
+            return str(p.get("identity", ""))
+    return str(message.get("from") or message.get("sender") or "")
+
+
+def _body(message: dict[str, Any]) -> str:
+    text = message.get("content") or message.get("text")
+    if not text and message.get("html"):
+        text = _SPACE.sub(" ", _TAG.sub(" ", str(message["html"])))
+    return str(text or "")
+
+
+def fts_query(query: str) -> str:
+    """Turn free text into an FTS5 query: every word must match, `word*` matches a prefix."""
+    terms = []
+    for term in _TERM.findall(query):
+        prefix = term.endswith("*")
+        term = term.rstrip("*")
+        if term:
+            terms.append(f'"{term}"*' if prefix else f'"{term}"')
+    if not terms:
+        raise ValueError("Search query has no words")
+    return " ".join(terms)
+
+
+class MirrorStore:
+    """Threads and messages per tenant and inbox, with an FTS5 message index."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS threads (
+                    tenant TEXT NOT NULL, thread_id TEXT NOT NULL, inbox_id TEXT NOT NULL,
+                    subject TEXT, last_message_at TEXT, message_count INTEGER, summary TEXT NOT NULL,
+                    PRIMARY KEY (tenant, thread_id));
+                CREATE INDEX IF NOT EXISTS threads_inbox ON threads (tenant, inbox_id);
+                CREATE TABLE IF NOT EXISTS messages (
+                    id INTEGER PRIMARY KEY, tenant TEXT NOT NULL, message_id TEXT NOT NULL,
+                    thread_id TEXT NOT NULL, inbox_id TEXT NOT NULL, direction TEXT, sender TEXT,
+                    subject TEXT, body TEXT, created_at TEXT, created REAL,
+                    UNIQUE (tenant, message_id));
+                CREATE INDEX IF NOT EXISTS messages_thread ON messages (tenant, thread_id);
+                CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+                    subject, body, sender, content='messages', content_rowid='id',
+                    tokenize='porter unicode61 remove_diacritics 2');
+                CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
+                    INSERT INTO messages_fts (rowid, subject, body, sender)
+                    VALUES (new.id, new.subject, new.body, new.sender);
+                END;
+                CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN
+                    INSERT INTO messages_fts (messages_fts, rowid, subject, body, sender)
+                    VALUES ('delete', old.id, old.subject, old.body, old.sender);
+                END;
+                CREATE TRIGGER IF NOT EXISTS messages_au AFTER UPDATE ON messages BEGIN
+                    INSERT INTO messages_fts (messages_fts, rowid, subject, body, sender)
+                    VALUES ('delete', old.id, old.subject, old.body, old.sender);
+                    INSERT INTO messages_fts (rowid, subject, body, sender)
+                    VALUES (new.id, new.subject, new.body, new.sender);
+                END;
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    tenant TEXT NOT NULL, inbox_id TEXT NOT NULL, synced_at REAL,
+                    backfill_cursor TEXT, retry TEXT NOT NULL DEFAULT '[]',
+                    catchup TEXT NOT NULL DEFAULT '[]',
+                    PRIMARY KEY (tenant, inbox_id));
+                """
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(sync_state)")}
+            if "catchup" not in columns:  # mirrors created before catch-up cursors
+                conn.execute("ALTER TABLE sync_state ADD COLUMN catchup TEXT NOT NULL DEFAULT '[]'")
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, fn: Any, *args: Any) -> Any:
+        def call() -> Any:
+            with self._lock:
+                return fn(self._db(), *args)
+
+        return await asyncio.to_thread(call)
+
+    # ── Sync bookkeeping ─────────────────────────────────────────────────────
+
+    async def state(self, tenant: str, inbox_id: str) -> Optional[dict[str, Any]]:
+        def query(db: sqlite3.Connection) -> Optional[dict[str, Any]]:
+            row = db.execute(
+                "SELECT synced_at, backfill_cursor, retry, catchup FROM sync_state"
+                " WHERE tenant = ? AND inbox_id = ?",
+                (tenant, inbox_id),
+            ).fetchone()
+            if row is None:
+                return None
+            return {
+                "synced_at": row[0], "backfill_cursor": row[1], "retry": jsonlib.loads(row[2]), "catchup": jsonlib.loads(row[3]),
+            }
+
+        return await self._run(query)
+
+    async def save_state(
+        self,
+        tenant: str,
+        inbox_id: str,
+        backfill_cursor: Optional[str],
+        catchup: list[str],
+        retry: list[dict[str, Any]],
+    ) -> None:
+        """Record a sync. `synced_at` only advances once no catch-up is left to resume."""
+
+        def update(db: sqlite3.Connection) -> None:
+            db.execute(
+                "INSERT INTO sync_state (tenant, inbox_id, synced_at, backfill_cursor, retry, catchup)"
+                " VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (tenant, inbox_id) DO UPDATE SET"
+                " synced_at = COALESCE(excluded.synced_at, sync_state.synced_at),"
+                " backfill_cursor = excluded.backfill_cursor, retry = excluded.retry,"
+                " catchup = excluded.catchup",
+                (
+                    tenant, inbox_id, None if catchup else time.time(), backfill_cursor,
+                    jsonlib.dumps(retry), jsonlib.dumps(catchup),
+                ),
+            )
+
+        await self._run(update)
+
+    async def mark_stale(self, inbox_id: str) -> None:
+        """Make the next search refresh this inbox, for every tenant mirroring it."""
+
+        def update(db: sqlite3.Connection) -> None:
+            db.execute("UPDATE sync_state SET synced_at = 0 WHERE inbox_id = ?", (inbox_id,))
+
+        await self._run(update)
+
+    async def versions(self, tenant: str, inbox_id: str) -> dict[str, Optional[str]]:
+        """thread_id → last_message_at of every mirrored thread in the inbox."""
+
+        def query(db: sqlite3.Connection) -> dict[str, Optional[str]]:
+            return dict(db.execute(
+                "SELECT thread_id, last_message_at FROM threads WHERE tenant = ? AND inbox_id = ?",
+                (tenant, inbox_id),
+            ))
+
+        return await self._run(query)
+
+    async def message_ids(self, tenant: str, thread_id: str) -> set[str]:
+        def query(db: sqlite3.Connection) -> set[str]:
+            rows = db.execute(
+                "SELECT message_id FROM messages WHERE tenant = ? AND thread_id = ?", (tenant, thread_id)
+            )
+            return {message_id for (message_id,) in rows}
+
+        return await self._run(query)
+
+    async def store_thread(
+        self, tenant: str, inbox_id: str, thread: dict[str, Any], messages: list[dict[str, Any]]
+    ) -> None:
+        """Upsert a thread and its new messages in one transaction.
+
+        The thread row, and with it the version a later sync compares
+        against, is only written together with its messages.
+        """
+        thread_id = thread["thread_id"]
+
+        def upsert(db: sqlite3.Connection) -> None:
+            db.execute("BEGIN")
+            try:
+                for m in messages:
+                    subject = (m.get("metadata") or {}).get("subject") or m.get("subject") or thread.get("subject")
+                    created_at = (m.get("metadata") or {}).get("created_at") or m.get("created_at")
+                    db.execute(
+                        "INSERT INTO messages (tenant, message_id, thread_id, inbox_id, direction, sender,"
+                        " subject, body, created_at, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                        " ON CONFLICT (tenant, message_id) DO UPDATE SET"
+                        " direction = excluded.direction, sender = excluded.sender, subject = excluded.subject,"
+                        " body = excluded.body, created_at = excluded.created_at, created = excluded.created",
+                        (
+                            tenant, m["message_id"], thread_id, inbox_id, m.get("direction"), _sender(m),
+                            subject, _body(m), created_at, _epoch(created_at),
+                        ),
+                    )
+                db.execute(
+                    "INSERT OR REPLACE INTO threads VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        tenant, thread_id, inbox_id, thread.get("subject"), thread.get("last_message_at"),
+                        thread.get("message_count"), jsonlib.dumps(thread),
+                    ),
+                )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+
+        await self._run(upsert)
+
+    async def stats(self, tenant: str, inbox_id: str) -> dict[str, int]:
+        def query(db: sqlite3.Connection) -> dict[str, int]:
+            threads = db.execute(
+                "SELECT COUNT(*) FROM threads WHERE tenant = ? AND inbox_id = ?", (tenant, inbox_id)
+            ).fetchone()[0]
+            messages = db.execute(
+                "SELECT COUNT(*) FROM messages WHERE tenant = ? AND inbox_id = ?", (tenant, inbox_id)
+            ).fetchone()[0]
+            return {"threads": threads, "messages": messages}
+
+        return await self._run(query)
+
+    async def synced_inboxes(self, tenant: str) -> dict[str, Optional[float]]:
+        def query(db: sqlite3.Connection) -> dict[str, Optional[float]]:
+            return dict(db.execute("SELECT inbox_id, synced_at FROM sync_state WHERE tenant = ?", (tenant,)))
+
+        return await self._run(query)
+
+    # ── Search ───────────────────────────────────────────────────────────────
+
+    async def search(
+        self,
+        tenant: str,
+        query: str,
+        inbox_id: Optional[str] = None,
+        direction: Optional[str] = None,
+        after: Optional[float] = None,
+        before: Optional[float] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> list[dict[str, Any]]:
+        """Messages matching `query`, best first (subject hits weigh most)."""
+        where = ["messages_fts MATCH ?", "m.tenant = ?"]
+        params: list[Any] = [fts_query(query), tenant]
+        for clause, value in (
+            ("m.inbox_id = ?", inbox_id),
+            ("m.direction = ?", direction),
+            ("m.created >= ?", after),
+            ("m.created < ?", before),
+        ):
+            if value is not None:
+                where.append(clause)
+                params.append(value)
+        sql = (
+            "SELECT m.thread_id, m.message_id, m.inbox_id, m.direction, m.sender, m.subject, m.created_at,"
+            " snippet(messages_fts, 1, '[', ']', '…', 16)"
+            " FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid"
+            f" WHERE {' AND '.join(where)}"
+            " ORDER BY bm25(messages_fts, 5.0, 1.0, 2.0) LIMIT ? OFFSET ?"
+        )
+        params += [limit, offset]
+        keys = ("thread_id", "message_id", "inbox_id", "direction", "sender", "subject", "created_at", "snippet")
+
+        def query_fn(db: sqlite3.Connection) -> list[dict[str, Any]]:
+            return [dict(zip(keys, row)) for row in db.execute(sql, params)]
+
+        return await self._run(query_fn)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
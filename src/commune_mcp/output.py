@@ -0,0 +1,92 @@
+"""
+Tool output shaping: JSON layout, field projection and body truncation.
+
+Large results (e.g. get_thread_messages with hundreds of messages) cost
+serialization time and model context. These helpers shrink them before
+they leave the server.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Iterable, Optional
+
+from commune_mcp import jsonlib
+
+# Message fields that can hold long bodies and are eligible for truncation
+BODY_FIELDS = frozenset({"content", "html", "text", "body"})
+
+
+def dumps(data: Any, compact: bool = True) -> str:
+    """Serialize tool output as compact or indented JSON."""
+    return jsonlib.dumps(data, pretty=not compact)
+
+
+def parse_fields(fields: Optional[str]) -> list[str]:
+    """Parse a comma-separated field list such as "message_id,metadata.subject"."""
+    return [f.strip() for f in (fields or "").split(",") if f.strip()]
+
+
+def project(data: Any, fields: Iterable[str]) -> Any:
+    """Keep only the given (dot-separated) fields of each record.
+
+    Applies to a single dict, a list of dicts, or the `data` list of a
+    paginated envelope (in which case the envelope keys are kept as-is).
+    """
+    paths = [f.split(".") for f in fields]
+    if not paths:
+        return data
+    if isinstance(data, list):
+        return [_pick(item, paths) for item in data]
+    if isinstance(data, dict) and isinstance(data.get("data"), list):
+        return {**data, "data": [_pick(item, paths) for item in data["data"]]}
+    return _pick(data, paths)
+
+
+def _pick(item: Any, paths: list[list[str]]) -> Any:
+    if not isinstance(item, dict):
+        return item
+    out: dict[str, Any] = {}
+    for path in paths:
+        src: Any = item
+        for part in path:
+            if not isinstance(src, dict) or part not in src:
+                break
+            src = src[part]
+        else:
+            dst = out
+            for part in path[:-1]:
+                dst = dst.setdefault(part, {})
+            dst[path[-1]] = src
+    return out
+
+
+def truncate_bodies(
+    data: Any,
+    max_chars: int,
+    stash: Callable[[str], str],
+) -> Any:
+    """Cut body fields longer than `max_chars`, returning a shortened copy.
+
+    The full text of every cut field is handed to `stash`, which returns a
+    continuation handle; the handle and original length are recorded next
+    to the field as `<field>_truncated`.
+    """
+    if max_chars <= 0:
+        return data
+    if isinstance(data, list):
+        return [truncate_bodies(v, max_chars, stash) for v in data]
+    if not isinstance(data, dict):
+        return data
+
+    out: dict[str, Any] = {}
+    for key, value in data.items():
+        if key in BODY_FIELDS and isinstance(value, str) and len(value) > max_chars:
+            out[key] = value[:max_chars]
+            out[f"{key}_truncated"] = {
+                "handle": stash(value),
+                "total_chars": len(value),
+                "next_offset": max_chars,
+            }
+        else:
+            out[key] = truncate_bodies(value, max_chars, stash)
+    return out
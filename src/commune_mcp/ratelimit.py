@@ -0,0 +1,155 @@
+"""
+Per-tenant client-side rate limiting and concurrency governing.
+
+Each API key gets a token bucket (requests per second with a burst) and a
+cap on in-flight requests; a global cap protects the shared connection
+pool. Callers that cannot proceed immediately wait in a bounded queue.
+When that queue is full, or the wait would exceed `max_wait`, the call
+fails fast with `RateLimited` so the agent can back off instead of piling
+up behind a noisy neighbour.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+
+class RateLimited(Exception):
+    """Raised when a call is rejected by the client-side rate limiter."""
+
+    def __init__(self, retry_after: float) -> None:
+        self.retry_after = retry_after
+        super().__init__(
+            f"Rate limited — too many Commune API calls in flight for this API key; "
+            f"retry after {int(retry_after * 1000)} ms"
+        )
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `rate` tokens per second."""
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """Take a token, possibly going into debt; return seconds to wait for it."""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def refund(self) -> None:
+        self._tokens = min(self.burst, self._tokens + 1)
+
+
+class _Tenant:
+    def __init__(self, rate: float, burst: float, max_in_flight: int) -> None:
+        self.bucket = TokenBucket(rate, burst) if rate > 0 else None
+        self.slots = asyncio.Semaphore(max_in_flight) if max_in_flight > 0 else None
+        self.waiting = 0
+        self.last_used = time.monotonic()
+
+
+class RateLimiter:
+    """Token-bucket rate limit plus max-in-flight semaphores keyed by API key."""
+
+    def __init__(
+        self,
+        rate: float = 20.0,
+        burst: float = 40.0,
+        max_in_flight: int = 16,
+        global_max_in_flight: int = 256,
+        max_queue: int = 64,
+        max_wait: float = 10.0,
+        max_tenants: int = 10_000,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.max_tenants = max_tenants
+        self.global_max_in_flight = global_max_in_flight
+        self.reset()
+        self.rejected = 0  # calls failed fast, for monitoring
+
+    def reset(self) -> None:
+        """Forget all tenants and semaphores, e.g. when starting on a new event loop."""
+        self._global = asyncio.Semaphore(self.global_max_in_flight) if self.global_max_in_flight > 0 else None
+        self._tenants: dict[str, _Tenant] = {}
+
+    def _tenant(self, key: str) -> _Tenant:
+        tenant = self._tenants.get(key)
+        if tenant is None:
+            if len(self._tenants) >= self.max_tenants:
+                self._evict_idle()
+            tenant = self._tenants[key] = _Tenant(self.rate, self.burst, self.max_in_flight)
+        tenant.last_used = time.monotonic()
+        return tenant
+
+    def _evict_idle(self) -> None:
+        """Forget the least recently used half of tenants with nothing in flight."""
+        idle = sorted(
+            (t.last_used, k) for k, t in self._tenants.items()
+            if t.waiting == 0 and (t.slots is None or not t.slots.locked())
+        )
+        for _, key in idle[: max(1, len(idle) // 2)]:
+            del self._tenants[key]
+
+    def _reject(self, retry_after: float) -> RateLimited:
+        self.rejected += 1
+        return RateLimited(retry_after)
+
+    @asynccontextmanager
+    async def acquire(self, key: str) -> AsyncIterator[None]:
+        """Hold a rate-limit token and an in-flight slot for `key` for the block."""
+        tenant = self._tenant(key)
+        if tenant.waiting >= self.max_queue:
+            raise self._reject(max(1.0 / self.rate, 0.1) if self.rate > 0 else 1.0)
+
+        deadline = time.monotonic() + self.max_wait
+        tenant.waiting += 1
+        try:
+            if tenant.bucket is not None:
+                delay = tenant.bucket.reserve()
+                if delay > self.max_wait:
+                    tenant.bucket.refund()
+                    raise self._reject(delay)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await self._wait_slot(tenant.slots, deadline)
+            try:
+                await self._wait_slot(self._global, deadline)
+            except BaseException:
+                if tenant.slots is not None:
+                    tenant.slots.release()
+                raise
+        finally:
+            tenant.waiting -= 1
+
+        try:
+            yield
+        finally:
+            if self._global is not None:
+                self._global.release()
+            if tenant.slots is not None:
+                tenant.slots.release()
+
+    async def _wait_slot(self, sem: Optional[asyncio.Semaphore], deadline: float) -> None:
+        if sem is None:
+            return
+        if not sem.locked():
+            await sem.acquire()  # free slot — returns without suspending
+            return
+        timeout = deadline - time.monotonic()
+        try:
+            await asyncio.wait_for(sem.acquire(), timeout=max(timeout, 0))
+        except asyncio.TimeoutError:
+            raise self._reject(self.max_wait) from None
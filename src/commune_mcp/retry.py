@@ -0,0 +1,148 @@
+"""
+Retry policy for transient Commune API failures.
+
+Retries 429/502/503/504 responses and transport errors with exponential
+backoff and full jitter, honouring `Retry-After`. Only idempotent methods
+are retried by default; other methods are retried only when the request
+provably never reached the API (connection failures, 429 rejections).
+
+A process-wide retry budget caps retries to a fraction of recent traffic,
+so an upstream outage cannot be amplified into a retry storm.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Iterable, Optional
+
+import httpx
+
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+# Errors raised before the request could have been sent — safe to retry for any method
+_NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryBudget:
+    """Token bucket limiting retries to a fraction of recent requests.
+
+    Every request deposits `ratio` tokens and every retry withdraws one.
+    `min_per_second` tokens trickle in regardless, so low-traffic processes
+    can still retry occasional failures.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 1.0, max_tokens: float = 100.0) -> None:
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.max_tokens, self._tokens + (now - self._updated) * self.min_per_second)
+        self._updated = now
+
+    def deposit(self) -> None:
+        self._refill()
+        self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """Take one retry token; False when the budget is exhausted."""
+        self._refill()
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter for one kind of upstream call."""
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.25,
+        max_delay: float = 5.0,
+        max_retry_after: float = 30.0,
+        methods: Iterable[str] = IDEMPOTENT_METHODS,
+        statuses: Iterable[int] = RETRY_STATUSES,
+        budget: Optional[RetryBudget] = None,
+    ) -> None:
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.methods = frozenset(m.upper() for m in methods)
+        self.statuses = frozenset(statuses)
+        self.budget = budget or RetryBudget()
+        self.retries = 0  # total retries performed, for monitoring
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number `attempt` (1-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def _retry_delay(self, method: str, attempt: int, resp: Optional[httpx.Response], exc: Optional[Exception]) -> Optional[float]:
+        """Seconds to wait before retrying, or None if this outcome is final."""
+        if attempt >= self.max_attempts:
+            return None
+        idempotent = method.upper() in self.methods
+        if exc is not None:
+            if not (idempotent or isinstance(exc, _NOT_SENT_ERRORS)):
+                return None
+            return self.backoff(attempt)
+        assert resp is not None
+        if resp.status_code not in self.statuses:
+            return None
+        if not idempotent and resp.status_code != 429:
+            return None
+        retry_after = parse_retry_after(resp.headers.get("retry-after"))
+        if retry_after is None:
+            return self.backoff(attempt)
+        if retry_after > self.max_retry_after:
+            return None  # the API asked for a longer pause than a tool call should wait
+        return retry_after
+
+    async def call(self, method: str, send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        """Run `send`, retrying transient failures. Returns the final response."""
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            attempt += 1
+            resp: Optional[httpx.Response] = None
+            try:
+                resp = await send()
+                exc: Optional[Exception] = None
+            except httpx.TransportError as e:
+                exc = e
+
+            delay = self._retry_delay(method, attempt, resp, exc)
+            if delay is None or not self.budget.withdraw():
+                if exc is not None:
+                    raise exc
+                assert resp is not None
+                return resp
+
+            if resp is not None:
+                await resp.aclose()
+            self.retries += 1
+            await asyncio.sleep(delay)
@@ -32,14 +32,42 @@ x402 wallet auth (pay-per-call, no API key needed):
 
 from __future__ import annotations
 
+import asyncio
+import base64
+import binascii
 import contextvars
+import hashlib
+import importlib.util
 import json
+import logging
+import mimetypes
 import os
+import secrets
 import sys
-from typing import Any, Literal, Optional
+import time
+import weakref
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Literal, Optional, Union
 
 import httpx
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
+from mcp.server.session import ServerSession
+
+from commune_mcp import jsonlib, mailevents, mailmerge, tracing
+from commune_mcp.attachments import AttachmentStore, tenant_id
+from commune_mcp.breaker import CircuitBreakers, CircuitOpen
+from commune_mcp.cache import TTLCache, freeze_params
+from commune_mcp.metrics import REGISTRY, X402_RETRIES, instrument_tool, upstream_timer
+from commune_mcp.mirror import MirrorStore
+from commune_mcp.output import dumps, parse_fields, project, truncate_bodies
+from commune_mcp.ratelimit import RateLimited, RateLimiter
+from commune_mcp.retry import RetryBudget, RetryPolicy
+from commune_mcp.singleflight import SingleFlight
+from commune_mcp.upload import FileBody, UploadStore, file_sha256
+from commune_mcp.watch import WatcherPool
+
+logger = logging.getLogger(__name__)
 
 # ── Configuration ────────────────────────────────────────────────────────────
 
@@ -55,10 +83,146 @@ _api_key_ctx: contextvars.ContextVar[str] = contextvars.ContextVar(
 # x402 client — set programmatically or via x402's own env-based setup
 _x402_client: Any = None
 
+# Shared async HTTP client — one connection pool reused by every tool call
+_client: Optional[httpx.AsyncClient] = None
+
 BASE_URL = os.environ.get(
     "COMMUNE_BASE_URL", "https://api.commune.email"
 ).rstrip("/")
 
+# Connection pool tuning for the shared client
+HTTP_TIMEOUT = float(os.environ.get("COMMUNE_HTTP_TIMEOUT", "30"))
+HTTP_MAX_CONNECTIONS = int(os.environ.get("COMMUNE_HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.environ.get("COMMUNE_HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("COMMUNE_HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP2 = os.environ.get("COMMUNE_HTTP2", "").lower() in ("1", "true", "yes")
+
+# Retries for transient upstream failures (429/502/503/504, timeouts)
+RETRY_MAX_ATTEMPTS = int(os.environ.get("COMMUNE_RETRY_MAX_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.environ.get("COMMUNE_RETRY_BASE_DELAY", "0.25"))
+RETRY_MAX_DELAY = float(os.environ.get("COMMUNE_RETRY_MAX_DELAY", "5"))
+RETRY_METHODS = os.environ.get("COMMUNE_RETRY_METHODS", "GET,HEAD,OPTIONS,PUT,DELETE")
+RETRY_BUDGET_RATIO = float(os.environ.get("COMMUNE_RETRY_BUDGET_RATIO", "0.2"))
+
+_retry_policy = RetryPolicy(
+    max_attempts=RETRY_MAX_ATTEMPTS,
+    base_delay=RETRY_BASE_DELAY,
+    max_delay=RETRY_MAX_DELAY,
+    methods=[m.strip() for m in RETRY_METHODS.split(",") if m.strip()],
+    budget=RetryBudget(ratio=RETRY_BUDGET_RATIO),
+)
+
+# Client-side rate limiting per API key, plus a global in-flight cap
+RATE_LIMIT_RPS = float(os.environ.get("COMMUNE_RATE_LIMIT_RPS", "20"))
+RATE_LIMIT_BURST = float(os.environ.get("COMMUNE_RATE_LIMIT_BURST", "40"))
+RATE_LIMIT_QUEUE = int(os.environ.get("COMMUNE_RATE_LIMIT_QUEUE", "64"))
+RATE_LIMIT_MAX_WAIT = float(os.environ.get("COMMUNE_RATE_LIMIT_MAX_WAIT", "10"))
+MAX_IN_FLIGHT_PER_KEY = int(os.environ.get("COMMUNE_MAX_IN_FLIGHT_PER_KEY", "16"))
+MAX_IN_FLIGHT = int(os.environ.get("COMMUNE_MAX_IN_FLIGHT", str(HTTP_MAX_CONNECTIONS)))
+
+_rate_limiter = RateLimiter(
+    rate=RATE_LIMIT_RPS,
+    burst=RATE_LIMIT_BURST,
+    max_in_flight=MAX_IN_FLIGHT_PER_KEY,
+    global_max_in_flight=MAX_IN_FLIGHT,
+    max_queue=RATE_LIMIT_QUEUE,
+    max_wait=RATE_LIMIT_MAX_WAIT,
+)
+
+# Circuit breaker per endpoint family (domains, threads, messages, delivery, credits)
+BREAKER_FAILURE_RATE = float(os.environ.get("COMMUNE_BREAKER_FAILURE_RATE", "0.5"))
+BREAKER_MIN_CALLS = int(os.environ.get("COMMUNE_BREAKER_MIN_CALLS", "10"))
+BREAKER_WINDOW = float(os.environ.get("COMMUNE_BREAKER_WINDOW", "30"))
+BREAKER_OPEN_FOR = float(os.environ.get("COMMUNE_BREAKER_OPEN_FOR", "15"))
+
+_breakers = CircuitBreakers(
+    failure_rate=BREAKER_FAILURE_RATE,
+    min_calls=BREAKER_MIN_CALLS,
+    window=BREAKER_WINDOW,
+    open_for=BREAKER_OPEN_FOR,
+)
+
+# Read-through cache for slow-changing reads (0 disables caching)
+CACHE_MAX_ENTRIES = int(os.environ.get("COMMUNE_CACHE_MAX_ENTRIES", "1024"))
+CACHE_TTL_DOMAINS = 300.0
+CACHE_TTL_DOMAIN_RECORDS = 300.0
+CACHE_TTL_INBOXES = 60.0
+CACHE_TTL_CREDIT_BUNDLES = 3600.0
+
+# Tool output: compact JSON by default, "pretty" for indented output
+OUTPUT_COMPACT = os.environ.get("COMMUNE_OUTPUT_FORMAT", "compact").lower() != "pretty"
+# Message bodies longer than this are cut and continued via read_continuation (0 disables)
+MAX_BODY_CHARS = int(os.environ.get("COMMUNE_MAX_BODY_CHARS", "4000"))
+CONTINUATION_TTL = 3600.0
+# Truncated tool results kept for read_continuation, per tenant
+CONTINUATIONS_PER_TENANT = 32
+CONTINUATION_TENANTS = 1024
+
+# Max concurrent upstream calls per bulk tool invocation
+BULK_CONCURRENCY = int(os.environ.get("COMMUNE_BULK_CONCURRENCY", "10"))
+
+# Streaming attachment uploads: directories upload_attachment_file may read
+# (os.pathsep-separated; unset means any path, except on the HTTP server where
+# callers are remote), the size limit, and how long chunked uploads are kept
+UPLOAD_ROOTS = [os.path.realpath(p) for p in os.environ.get("COMMUNE_UPLOAD_ROOTS", "").split(os.pathsep) if p]
+MAX_UPLOAD_BYTES = int(os.environ.get("COMMUNE_MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+UPLOAD_TTL = 3600.0
+MAX_PENDING_UPLOADS = 100  # per API key
+_local_files_restricted = False
+
+# Local attachment store under COMMUNE_DATA_DIR: re-uploading identical bytes
+# returns the earlier attachment_id for this long (0 disables), and downloaded
+# attachments are cached on disk up to a total size
+DATA_DIR = os.environ.get("COMMUNE_DATA_DIR") or os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "commune-mcp"
+)
+ATTACHMENT_DEDUPE_TTL = float(os.environ.get("COMMUNE_ATTACHMENT_DEDUPE_TTL", str(7 * 86400)))
+ATTACHMENT_CACHE_BYTES = int(os.environ.get("COMMUNE_ATTACHMENT_CACHE_BYTES", str(512 * 1024 * 1024)))
+_attachments = AttachmentStore(DATA_DIR, ATTACHMENT_DEDUPE_TTL, ATTACHMENT_CACHE_BYTES)
+# Chunked uploads in progress, under COMMUNE_DATA_DIR so any worker can take the next chunk
+_uploads = UploadStore(os.path.join(DATA_DIR, "uploads"), UPLOAD_TTL)
+
+# Bulk sends: most recipients per job; jobs persist in COMMUNE_DATA_DIR so
+# they can be resumed after a restart. A running job is owned in the database and
+# its owner heartbeats this often; after 4 missed beats another worker may take it.
+MAX_BULK_RECIPIENTS = int(os.environ.get("COMMUNE_MAX_BULK_RECIPIENTS", "10000"))
+BULK_HEARTBEAT = 15.0
+_bulk_jobs = mailmerge.BulkJobStore(os.path.join(DATA_DIR, "bulk_jobs.db"), stale_after=4 * BULK_HEARTBEAT)
+
+# Local thread mirror for search_mirror, in COMMUNE_DATA_DIR; searches first
+# refresh an inbox synced longer ago than this many seconds (0 disables)
+MIRROR_MAX_AGE = float(os.environ.get("COMMUNE_MIRROR_MAX_AGE", "300"))
+_mirror = MirrorStore(os.path.join(DATA_DIR, "mirror.db"))
+# Pending catch-up cursors kept per inbox; past this, a `full` sync is the way back
+MIRROR_MAX_CATCHUPS = 20
+# One sync per (api_key, inbox) at a time; concurrent callers share it
+_mirror_syncs = SingleFlight()
+
+# New-mail events from the HTTP server's webhook receiver, for wait_for_new_mail
+# and subscribe_new_mail; the longest a wait_for_new_mail call may block
+_mail_feed = mailevents.MailFeed()
+_mail_subscribers: dict[str, weakref.WeakSet[ServerSession]] = {}
+_webhook_receiver = False
+MAX_WAIT_SECONDS = float(os.environ.get("COMMUNE_MAX_WAIT_SECONDS", "300"))
+
+# wait_for_new_messages: one shared poller per (tenant, inbox), backing off from
+# the min to the max interval while nothing changes, and threads per poll
+WATCH_MIN_INTERVAL = float(os.environ.get("COMMUNE_WATCH_MIN_INTERVAL", "2"))
+WATCH_MAX_INTERVAL = float(os.environ.get("COMMUNE_WATCH_MAX_INTERVAL", "30"))
+WATCH_PAGE_SIZE = 50
+_watchers = WatcherPool(WATCH_MIN_INTERVAL, WATCH_MAX_INTERVAL)
+
+
+# Per-tenant read-through cache, keyed by (api_key, method, path, params)
+_cache = TTLCache(maxsize=CACHE_MAX_ENTRIES)
+
+# Full text of truncated message bodies: one entry per tool result, holding
+# every body cut from it, in an LRU of its own per tenant (api_key)
+_continuations: OrderedDict[str, TTLCache] = OrderedDict()
+
+# In-flight GETs shared between concurrent callers with the same key
+_inflight = SingleFlight()
+
 
 def set_x402_client(client: Any) -> None:
     """Set a pre-configured x402 client for wallet-based payments.
@@ -93,74 +257,314 @@ def _headers() -> dict[str, str]:
     return h
 
 
-def _handle_402(resp: httpx.Response, method: str, url: str, **kwargs: Any) -> httpx.Response:
+def create_http_client() -> httpx.AsyncClient:
+    """Build the shared async HTTP client from the pool configuration.
+
+    HTTP/2 is only enabled when COMMUNE_HTTP2 is set and the `h2` package
+    is installed (`pip install commune-mcp[http2]`).
+    """
+    http2 = HTTP2 and importlib.util.find_spec("h2") is not None
+    if HTTP2 and not http2:
+        logger.warning("COMMUNE_HTTP2 is set but h2 is not installed — using HTTP/1.1")
+    return httpx.AsyncClient(
+        timeout=HTTP_TIMEOUT,
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+def open_http_client() -> httpx.AsyncClient:
+    """Create the shared client if needed and return it.
+
+    The HTTP server calls this from its lifespan; stdio mode creates the
+    client lazily on the first tool call.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_http_client()
+    return _client
+
+
+async def close_http_client() -> None:
+    """Close the shared client and release its pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def reset_worker_state() -> None:
+    """Start this process with empty caches and fresh rate-limiter state.
+
+    The HTTP server calls this from its lifespan, which runs once in each
+    uvicorn worker, so cached data and loop-bound semaphores never carry
+    over from a parent process or a previous event loop.
+    """
+    _cache.clear()
+    _continuations.clear()
+    _rate_limiter.reset()
+    _attachments.close()  # reopened on first use in this process
+    _uploads.close()
+    _bulk_jobs.close()
+    _mirror.close()
+    _mail_feed.clear()
+    _mail_subscribers.clear()
+    _watchers.clear()
+
+
+async def close_worker_state() -> None:
+    """Remove expired chunked uploads and close this process's upload store.
+
+    Called from the HTTP server's lifespan on shutdown. Uploads that are
+    still fresh stay on disk for the other workers.
+    """
+    try:
+        await _uploads.expire()
+    except Exception as exc:
+        logger.warning("Could not clean up expired uploads: %s", exc)
+    _uploads.close()
+
+
+def restrict_local_files() -> None:
+    """Only let upload_attachment_file read under COMMUNE_UPLOAD_ROOTS, and
+    make download_attachment return a URL instead of writing to the host.
+
+    Called by the HTTP server, whose callers are remote and must not be able
+    to read arbitrary files from the host or fill its disk.
+    """
+    global _local_files_restricted
+    _local_files_restricted = True
+
+
+def enable_webhook_receiver() -> None:
+    """Mark new-mail events as available; called when the HTTP server mounts its webhook route."""
+    global _webhook_receiver
+    _webhook_receiver = True
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Get the shared async HTTP client, creating it on first use."""
+    return open_http_client()
+
+
+async def _http_attempt(method: str, url: str, **kwargs: Any) -> httpx.Response:
+    """Send one upstream request, traced as a `commune.http` span when tracing is on.
+
+    A `body` factory (e.g. `FileBody`) is called per attempt, so streamed
+    request bodies survive retries and the x402 payment retry.
+    """
+    body = kwargs.pop("body", None)
+    if body is not None:
+        kwargs["content"] = body()
+    if not tracing.enabled():
+        return await _get_client().request(method, url, **kwargs)
+    content = kwargs.get("content") or b""
+    attributes = {
+        "http.request.method": method,
+        "url.template": tracing.path_template(httpx.URL(url).path),
+        "http.request.body.size": len(content) if isinstance(content, bytes) else body.content_length,
+        "commune.x402_payment": "PAYMENT-SIGNATURE" in (kwargs.get("headers") or {}),
+    }
+    with tracing.span(f"commune.http {method}", attributes) as span:
+        resp = await _get_client().request(method, url, **kwargs)
+        tracing.set_attributes(span, {
+            "http.response.status_code": resp.status_code,
+            "http.response.body.size": len(resp.content),
+        })
+        return resp
+
+
+async def _handle_402(resp: httpx.Response, method: str, url: str, **kwargs: Any) -> httpx.Response:
     """Handle a 402 Payment Required response using x402 wallet."""
     x402 = _get_x402()
     if x402 is None:
         resp.raise_for_status()  # No wallet configured — raise the 402
         return resp  # unreachable, but satisfies type checker
 
-    body = resp.json()
+    body = jsonlib.loads(resp.content)
     accepts = body.get("accepts", [])
     if not accepts:
         resp.raise_for_status()
         return resp
 
     payment_payload = x402.create_payment_payload(accepts)
+    X402_RETRIES.inc()
     headers = dict(kwargs.pop("headers", {}))
     headers["PAYMENT-SIGNATURE"] = payment_payload
     headers["Content-Type"] = "application/json"
-    kwargs.pop("timeout", None)
-    return httpx.request(method, url, headers=headers, timeout=30, **kwargs)
+    return await _retry_policy.call(
+        method, lambda: _http_attempt(method, url, headers=headers, **kwargs)
+    )
 
 
-def _unwrap(resp: httpx.Response) -> Any:
-    """Unwrap response JSON, extracting `data` if present."""
+def _unwrap(resp: httpx.Response, envelope: bool = False) -> Any:
+    """Unwrap response JSON, extracting `data` if present.
+
+    With `envelope=True` the full body is returned, e.g. to keep
+    `next_cursor`/`has_more` on paginated endpoints.
+    """
     resp.raise_for_status()
-    body = resp.json()
+    body = jsonlib.loads(resp.content)
+    if envelope:
+        return body
     return body.get("data", body) if isinstance(body, dict) else body
 
 
-def _request(method: str, path: str, **kwargs: Any) -> Any:
-    """Make an HTTP request with automatic x402 payment retry."""
+async def _request(method: str, path: str, envelope: bool = False, **kwargs: Any) -> Any:
+    """Make an HTTP request, coalescing concurrent identical GETs per API key."""
+    with upstream_timer():
+        if method != "GET" or set(kwargs) - {"params"}:
+            return await _send(method, path, envelope, **kwargs)
+        key = (_api_key_ctx.get(), method, path, freeze_params(kwargs.get("params")), envelope)
+        return await _inflight.do(key, lambda: _send(method, path, envelope, **kwargs))
+
+
+async def _send(method: str, path: str, envelope: bool = False, **kwargs: Any) -> Any:
+    """Make an HTTP request with transient-failure retries and x402 payment retry."""
     url = f"{BASE_URL}{path}"
     kwargs.setdefault("headers", _headers())
-    kwargs.setdefault("timeout", 30)
-    resp = httpx.request(method, url, **kwargs)
-    if resp.status_code == 402:
-        resp = _handle_402(resp, method, url, **kwargs)
-    return _unwrap(resp)
+    payload = kwargs.pop("json", None)
+    if payload is not None:
+        kwargs["content"] = jsonlib.dumps_bytes(payload)
+    breaker = _breakers.for_path(path)
+    breaker.before_call()  # fail fast while this endpoint family is failing
+    try:
+        async with _rate_limiter.acquire(_api_key_ctx.get()):
+            resp = await _retry_policy.call(
+                method, lambda: _http_attempt(method, url, **kwargs)
+            )
+            if resp.status_code == 402:
+                resp = await _handle_402(resp, method, url, **kwargs)
+    except httpx.TransportError:
+        breaker.record(False)
+        raise
+    except BaseException:
+        breaker.release()
+        raise
+    breaker.record(resp.status_code < 500)
+    return _unwrap(resp, envelope)
+
+
+async def _get(
+    path: str,
+    params: Optional[dict[str, Any]] = None,
+    ttl: float = 0,
+) -> Any:
+    """GET request to the Commune v1 API.
+
+    With a positive `ttl`, the result is served from the per-tenant
+    read-through cache for that many seconds.
+    """
+    clean = {k: v for k, v in (params or {}).items() if v is not None}
+    if ttl <= 0:
+        return await _request("GET", path, params=clean or None)
 
+    key = (_api_key_ctx.get(), "GET", path, freeze_params(clean))
+    hit, value = _cache.get(key)
+    if hit:
+        return value
+    value = await _request("GET", path, params=clean or None)
+    _cache.set(key, value, ttl)
+    return value
 
-def _get(path: str, params: Optional[dict[str, Any]] = None) -> Any:
-    """GET request to the Commune v1 API."""
-    clean = {k: v for k, v in (params or {}).items() if v is not None}
-    return _request("GET", path, params=clean or None)
 
+def _invalidate(*prefixes: str) -> None:
+    """Drop the current tenant's cached reads under the given path prefixes."""
+    _cache.invalidate(_api_key_ctx.get(), *prefixes)
 
-def _post(path: str, payload: Optional[dict[str, Any]] = None) -> Any:
+
+async def _post(path: str, payload: Optional[dict[str, Any]] = None) -> Any:
     """POST request to the Commune v1 API."""
-    return _request("POST", path, json=payload)
+    return await _request("POST", path, json=payload)
 
 
-def _put(path: str, payload: Optional[dict[str, Any]] = None) -> Any:
+async def _put(path: str, payload: Optional[dict[str, Any]] = None) -> Any:
     """PUT request to the Commune v1 API."""
-    return _request("PUT", path, json=payload)
+    return await _request("PUT", path, json=payload)
 
 
-def _delete(path: str) -> Any:
+async def _delete(path: str) -> Any:
     """DELETE request to the Commune v1 API."""
-    return _request("DELETE", path)
+    return await _request("DELETE", path)
 
 
-def _delete_with_body(path: str, payload: dict[str, Any]) -> Any:
+async def _delete_with_body(path: str, payload: dict[str, Any]) -> Any:
     """DELETE request with JSON body to the Commune v1 API."""
-    return _request("DELETE", path, json=payload)
+    return await _request("DELETE", path, json=payload)
+
+
+def _fmt(data: Any, fields: Optional[str] = None) -> str:
+    """Format data as JSON tool output, optionally projected to `fields`."""
+    if fields:
+        data = project(data, parse_fields(fields))
+    return dumps(data, compact=OUTPUT_COMPACT)
+
+
+def _truncate(data: Any) -> Any:
+    """Cut long message bodies, leaving continuation handles in their place.
 
+    All bodies cut from one result are kept as a single cache entry, so
+    they expire together and a large result cannot evict its own handles.
+    Handles are `<result handle>:<index>`.
+    """
+    result = f"cont_{secrets.token_urlsafe(12)}"
+    bodies: list[str] = []
+
+    def stash(text: str) -> str:
+        bodies.append(text)
+        return f"{result}:{len(bodies) - 1}"
+
+    data = truncate_bodies(data, MAX_BODY_CHARS, stash)
+    if bodies:
+        api_key = _api_key_ctx.get()
+        tenant = _continuations.get(api_key)
+        if tenant is None:
+            tenant = _continuations[api_key] = TTLCache(maxsize=CONTINUATIONS_PER_TENANT)
+            while len(_continuations) > CONTINUATION_TENANTS:
+                _continuations.popitem(last=False)
+        else:
+            _continuations.move_to_end(api_key)
+        tenant.set((api_key, "BODY", result, ()), bodies, CONTINUATION_TTL)
+    return data
+
+
+def _split_csv(value: str) -> list[str]:
+    """Split a comma-separated tool argument into trimmed, non-empty items."""
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def _error_summary(exc: Exception) -> str:
+    """Short, single-line description of a failed upstream call."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return f"HTTP {exc.response.status_code}: {exc.response.text[:200]}"
+    return f"{type(exc).__name__}: {exc}"
+
+
+async def _run_bulk(
+    items: list[Any],
+    fn: Callable[[Any], Awaitable[Any]],
+    concurrency: int = BULK_CONCURRENCY,
+) -> list[Optional[Exception]]:
+    """Run `fn` over `items` with bounded concurrency.
+
+    Returns one entry per item, in order: None on success, the exception
+    on failure. A failing item never aborts the rest of the batch.
+    """
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def _one(item: Any) -> Optional[Exception]:
+        async with sem:
+            try:
+                await fn(item)
+            except Exception as exc:
+                return exc
+            return None
 
-def _fmt(data: Any) -> str:
-    """Format data as indented JSON for readable tool output."""
-    return json.dumps(data, indent=2, default=str)
+    return list(await asyncio.gather(*(_one(item) for item in items)))
 
 
 # ═════════════════════════════════════════════════════════════════════════════
@@ -169,17 +573,17 @@ def _fmt(data: Any) -> str:
 
 
 @mcp.tool()
-def list_domains() -> str:
+async def list_domains() -> str:
     """List all email domains in your Commune account.
 
     Returns each domain's ID, name, and verification status.
     Use the domain ID with other tools like list_inboxes or create_inbox.
     """
-    return _fmt(_get("/v1/domains"))
+    return _fmt(await _get("/v1/domains", ttl=CACHE_TTL_DOMAINS))
 
 
 @mcp.tool()
-def create_domain(name: str, region: Optional[str] = None) -> str:
+async def create_domain(name: str, region: Optional[str] = None) -> str:
     """Create a new custom email domain.
 
     After creating a domain, you need to:
@@ -194,11 +598,13 @@ def create_domain(name: str, region: Optional[str] = None) -> str:
     payload: dict[str, Any] = {"name": name}
     if region:
         payload["region"] = region
-    return _fmt(_post("/v1/domains", payload))
+    result = await _post("/v1/domains", payload)
+    _invalidate("/v1/domains")
+    return _fmt(result)
 
 
 @mcp.tool()
-def verify_domain(domain_id: str) -> str:
+async def verify_domain(domain_id: str) -> str:
     """Trigger DNS verification for a domain.
 
     Call this after adding the required DNS records at your registrar.
@@ -207,11 +613,13 @@ def verify_domain(domain_id: str) -> str:
     Args:
         domain_id: The domain ID (from list_domains)
     """
-    return _fmt(_post(f"/v1/domains/{domain_id}/verify"))
+    result = await _post(f"/v1/domains/{domain_id}/verify")
+    _invalidate("/v1/domains")
+    return _fmt(result)
 
 
 @mcp.tool()
-def get_domain_records(domain_id: str) -> str:
+async def get_domain_records(domain_id: str) -> str:
     """Get the DNS records required to verify a domain.
 
     Returns MX, TXT, and CNAME records that must be added
@@ -220,7 +628,7 @@ def get_domain_records(domain_id: str) -> str:
     Args:
         domain_id: The domain ID (from list_domains)
     """
-    return _fmt(_get(f"/v1/domains/{domain_id}/records"))
+    return _fmt(await _get(f"/v1/domains/{domain_id}/records", ttl=CACHE_TTL_DOMAIN_RECORDS))
 
 
 # ═════════════════════════════════════════════════════════════════════════════
@@ -229,7 +637,7 @@ def get_domain_records(domain_id: str) -> str:
 
 
 @mcp.tool()
-def list_inboxes(domain_id: Optional[str] = None) -> str:
+async def list_inboxes(domain_id: Optional[str] = None) -> str:
     """List inboxes.
 
     Without domain_id, lists all inboxes across all domains.
@@ -242,12 +650,12 @@ def list_inboxes(domain_id: Optional[str] = None) -> str:
         domain_id: Filter by domain (optional, lists all if omitted)
     """
     if domain_id:
-        return _fmt(_get(f"/v1/domains/{domain_id}/inboxes"))
-    return _fmt(_get("/v1/inboxes"))
+        return _fmt(await _get(f"/v1/domains/{domain_id}/inboxes", ttl=CACHE_TTL_INBOXES))
+    return _fmt(await _get("/v1/inboxes", ttl=CACHE_TTL_INBOXES))
 
 
 @mcp.tool()
-def create_inbox(
+async def create_inbox(
     local_part: str,
     domain_id: Optional[str] = None,
     name: Optional[str] = None,
@@ -276,22 +684,27 @@ def create_inbox(
         payload["display_name"] = display_name
     if webhook_endpoint:
         payload["webhook"] = {"endpoint": webhook_endpoint}
-    return _fmt(_post("/v1/inboxes", payload))
+    result = await _post("/v1/inboxes", payload)
+    # domain_id may be auto-resolved server-side, so drop every domain's inbox list
+    _invalidate("/v1/inboxes", "/v1/domains")
+    return _fmt(result)
 
 
 @mcp.tool()
-def delete_inbox(domain_id: str, inbox_id: str) -> str:
+async def delete_inbox(domain_id: str, inbox_id: str) -> str:
     """Delete an inbox.
 
     Args:
         domain_id: The domain ID
         inbox_id: The inbox ID to delete
     """
-    return _fmt(_delete(f"/v1/domains/{domain_id}/inboxes/{inbox_id}"))
+    result = await _delete(f"/v1/domains/{domain_id}/inboxes/{inbox_id}")
+    _invalidate("/v1/inboxes", f"/v1/domains/{domain_id}/inboxes")
+    return _fmt(result)
 
 
 @mcp.tool()
-def set_extraction_schema(
+async def set_extraction_schema(
     domain_id: str,
     inbox_id: str,
     name: str,
@@ -323,7 +736,7 @@ def set_extraction_schema(
         payload["description"] = description
 
     return _fmt(
-        _put(
+        await _put(
             f"/v1/domains/{domain_id}/inboxes/{inbox_id}/extraction-schema",
             payload,
         )
@@ -331,9 +744,9 @@ def set_extraction_schema(
 
 
 @mcp.tool()
-def remove_extraction_schema(domain_id: str, inbox_id: str) -> str:
+async def remove_extraction_schema(domain_id: str, inbox_id: str) -> str:
     """Remove structured extraction schema from an inbox."""
-    return _fmt(_delete(f"/v1/domains/{domain_id}/inboxes/{inbox_id}/extraction-schema"))
+    return _fmt(await _delete(f"/v1/domains/{domain_id}/inboxes/{inbox_id}/extraction-schema"))
 
 
 # ═════════════════════════════════════════════════════════════════════════════
@@ -342,12 +755,13 @@ def remove_extraction_schema(domain_id: str, inbox_id: str) -> str:
 
 
 @mcp.tool()
-def list_threads(
+async def list_threads(
     inbox_id: Optional[str] = None,
     domain_id: Optional[str] = None,
     limit: int = 20,
     cursor: Optional[str] = None,
     order: str = "desc",
+    fields: Optional[str] = None,
 ) -> str:
     """List email threads (conversations) with pagination.
 
@@ -362,6 +776,8 @@ def list_threads(
         limit: Results per page, 1-100 (default: 20)
         cursor: Pagination cursor from a previous response's next_cursor
         order: "desc" for newest first (default), "asc" for oldest first
+        fields: Comma-separated fields to return per thread (optional),
+                e.g. "thread_id,subject,last_message_at"
     """
     params: dict[str, Any] = {"limit": limit, "order": order}
     if inbox_id:
@@ -372,30 +788,275 @@ def list_threads(
         params["cursor"] = cursor
 
     # Thread endpoint returns {data, next_cursor, has_more} — return full envelope
-    return _fmt(_request("GET", "/v1/threads", params=params))
+    return _fmt(await _request("GET", "/v1/threads", params=params, envelope=True), fields)
 
 
 @mcp.tool()
-def get_thread_messages(
+async def get_thread_messages(
     thread_id: str,
     limit: int = 50,
     order: str = "asc",
+    fields: Optional[str] = None,
 ) -> str:
     """Get all messages in an email thread.
 
     Returns the full conversation with sender, content, timestamps.
+    Very long message bodies are cut short; the message then carries a
+    `<field>_truncated` entry whose handle can be passed to read_continuation.
 
     Args:
         thread_id: The thread ID (from list_threads)
         limit: Max messages, 1-1000 (default: 50)
         order: "asc" for chronological (default), "desc" for newest first
+        fields: Comma-separated fields to return per message (optional),
+                e.g. "message_id,direction,metadata.subject"
     """
-    return _fmt(
-        _get(
-            f"/v1/threads/{thread_id}/messages",
-            {"limit": limit, "order": order},
-        )
+    messages = await _get(
+        f"/v1/threads/{thread_id}/messages",
+        {"limit": limit, "order": order},
     )
+    if fields:
+        messages = project(messages, parse_fields(fields))
+    return _fmt(_truncate(messages))
+
+
+@mcp.tool()
+async def read_continuation(handle: str, offset: int = 0, length: int = 0) -> str:
+    """Read more of a message body that was truncated in a tool result.
+
+    Args:
+        handle: The handle from a `<field>_truncated` entry
+        offset: Character offset to start from (use next_offset from the truncated entry)
+        length: Characters to return (default: same as the truncation limit)
+    """
+    if offset < 0 or length < 0:
+        raise ValueError("offset and length must not be negative")
+    api_key = _api_key_ctx.get()
+    result, _, index = handle.rpartition(":")
+    tenant = _continuations.get(api_key)
+    hit, bodies = tenant.get((api_key, "BODY", result, ())) if tenant is not None else (False, None)
+    if not hit or not index.isdigit() or int(index) >= len(bodies):
+        raise ValueError(f"Unknown or expired continuation handle: {handle}")
+    text = bodies[int(index)]
+    length = length if length > 0 else max(MAX_BODY_CHARS, 1)
+    end = min(offset + length, len(text))
+    return _fmt({
+        "text": text[offset:end],
+        "offset": offset,
+        "next_offset": end if end < len(text) else None,
+        "total_chars": len(text),
+    })
+
+
+async def _iter_thread_pages(
+    params: dict[str, Any],
+    max_pages: int,
+) -> AsyncIterator[dict[str, Any]]:
+    """Walk /v1/threads pages via next_cursor, yielding (cursor, page envelope).
+
+    `cursor` is the one the page was requested with. The next page is
+    requested as soon as the current one arrives, so it downloads while the
+    caller processes the current page.
+    """
+    pages = 0
+    cursor = params.get("cursor")
+    fetch: Optional[asyncio.Future[Any]] = asyncio.ensure_future(
+        _request("GET", "/v1/threads", params=params, envelope=True)
+    )
+    try:
+        while fetch is not None:
+            page = await fetch
+            pages += 1
+            fetch = None
+            next_cursor = page.get("next_cursor")
+            if page.get("has_more") and next_cursor and pages < max_pages:
+                fetch = asyncio.ensure_future(
+                    _request("GET", "/v1/threads", params={**params, "cursor": next_cursor}, envelope=True)
+                )
+            yield cursor, page
+            cursor = next_cursor
+    finally:
+        if fetch is not None:
+            # The caller stopped early: drop the prefetch, and its error if it already failed
+            fetch.cancel()
+            fetch.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+
+def _parse_ts(value: Any) -> Optional[datetime]:
+    """Parse an ISO-8601 timestamp or date, treating naive values as UTC."""
+    if not value:
+        return None
+    try:
+        ts = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def _thread_senders(thread: dict[str, Any]) -> str:
+    """Collect sender-ish fields of a thread summary into one lowercase string."""
+    parts = [str(thread.get(k, "")) for k in ("from", "sender", "from_address", "last_sender")]
+    for p in thread.get("participants") or []:
+        parts.append(str(p.get("identity", "")) if isinstance(p, dict) else str(p))
+    return " ".join(parts).lower()
+
+
+@mcp.tool()
+async def find_threads(
+    inbox_id: Optional[str] = None,
+    domain_id: Optional[str] = None,
+    status: Optional[str] = None,
+    tag: Optional[str] = None,
+    sender: Optional[str] = None,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    order: str = "desc",
+    max_results: int = 50,
+    max_pages: int = 10,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+) -> str:
+    """Find threads matching filters, walking through pages automatically.
+
+    Use this instead of calling list_threads page by page. Pages are fetched
+    server-side (up to max_pages of 100 threads) and only matching thread
+    summaries are returned. If more may match, call again with the same
+    filters and the returned next_cursor, or with a narrower date range.
+    Threads whose status/tags could not be loaded are listed under
+    "unverified" instead of being silently dropped.
+
+    Provide at least one of inbox_id or domain_id.
+
+    Args:
+        inbox_id: Filter threads by inbox (recommended)
+        domain_id: Filter threads by domain
+        status: Only threads with this triage status (open, needs_reply, waiting, closed)
+        tag: Only threads carrying this tag
+        sender: Only threads whose sender/participants contain this text (e.g. "@acme.com")
+        after: Only threads with last activity at or after this ISO date/time
+        before: Only threads with last activity before this ISO date/time
+        order: "desc" for newest first (default), "asc" for oldest first
+        max_results: Stop after this many matches (default: 50)
+        max_pages: Maximum pages of 100 threads to scan (default: 10)
+        fields: Comma-separated fields to return per thread (optional),
+                e.g. "thread_id,subject,last_message_at"
+        cursor: next_cursor from a previous find_threads call, to continue
+    """
+    params: dict[str, Any] = {"limit": 100, "order": order}
+    # A cursor may point inside a page: "<page cursor>#<threads to skip>"
+    skip = 0
+    if cursor:
+        page_cursor, sep, offset = cursor.rpartition("#")
+        if sep and offset.isdigit():
+            cursor, skip = page_cursor or None, int(offset)
+        if cursor:
+            params["cursor"] = cursor
+    if inbox_id:
+        params["inbox_id"] = inbox_id
+    if domain_id:
+        params["domain_id"] = domain_id
+    after_ts, before_ts = _parse_ts(after), _parse_ts(before)
+    sender_q = sender.lower() if sender else None
+
+    matches: list[dict[str, Any]] = []
+    unverified: list[tuple[dict[str, Any], Exception]] = []
+    lookups = 0
+    scanned = pages = 0
+    next_cursor: Optional[str] = None
+    exhausted = False
+
+    pager = _iter_thread_pages(params, max(1, max_pages))
+    try:
+        async for page_cursor, page in pager:
+            pages += 1
+            next_cursor = page.get("next_cursor") if page.get("has_more") else None
+            threads = page.get("data") or []
+            candidates: list[tuple[int, dict[str, Any]]] = []
+            for index, thread in enumerate(threads[skip:], start=skip):
+                scanned += 1
+                ts = _parse_ts(thread.get("last_message_at"))
+                if ts and after_ts and ts < after_ts:
+                    # Sorted by activity: everything past this point is out of range
+                    exhausted = order == "desc"
+                    continue
+                if ts and before_ts and ts >= before_ts:
+                    exhausted = order == "asc"
+                    continue
+                if sender_q and sender_q not in _thread_senders(thread):
+                    continue
+                candidates.append((index, thread))
+            skip = 0
+
+            # Load metadata only for as many candidates as could still be returned
+            while candidates and len(matches) < max_results:
+                batch, candidates = candidates[:max_results - len(matches)], candidates[max_results - len(matches):]
+                kept = [t for _, t in batch]
+                if status or tag:
+                    kept, failed, looked_up = await _filter_by_metadata(kept, status, tag)
+                    unverified.extend(failed)
+                    lookups += looked_up
+                matches.extend(kept)
+
+            if candidates:
+                # Stopped partway through the page: continue at its next candidate
+                next_cursor, exhausted = f"{page_cursor or ''}#{candidates[0][0]}", False
+            if len(matches) >= max_results or exhausted:
+                break
+    finally:
+        await pager.aclose()
+
+    if lookups and len(unverified) == lookups:
+        raise unverified[0][1]  # nothing could be checked: surface the error, not an empty result
+
+    result: dict[str, Any] = {
+        "data": project(matches[:max_results], parse_fields(fields)),
+        "scanned": scanned,
+        "pages": pages,
+        "next_cursor": None if exhausted else next_cursor,
+        "has_more": bool(next_cursor) and not exhausted,
+    }
+    if unverified:
+        # Threads whose status/tags could not be loaded: they may or may not match
+        result["unverified"] = [
+            {"thread_id": t["thread_id"], "error": _error_summary(exc)} for t, exc in unverified[:20]
+        ]
+        result["unverified_count"] = len(unverified)
+    return _fmt(result)
+
+
+async def _filter_by_metadata(
+    threads: list[dict[str, Any]],
+    status: Optional[str],
+    tag: Optional[str],
+) -> tuple[list[dict[str, Any]], list[tuple[dict[str, Any], Exception]], int]:
+    """Keep threads whose status/tags match, loading triage metadata when needed.
+
+    Returns the matching threads, the threads whose metadata failed to load
+    (with the error), and how many metadata lookups were made.
+    """
+    meta: dict[str, Any] = {}
+    lookups = [t for t in threads if not ("status" in t and "tags" in t)]
+    for thread in threads:
+        if "status" in thread and "tags" in thread:
+            meta[thread["thread_id"]] = thread
+
+    async def _load(thread: dict[str, Any]) -> None:
+        meta[thread["thread_id"]] = await _get(f"/v1/threads/{thread['thread_id']}/metadata")
+
+    errors = await _run_bulk(lookups, _load)
+    failed = [(t, exc) for t, exc in zip(lookups, errors) if exc is not None]
+
+    kept = []
+    for thread in threads:
+        m = meta.get(thread.get("thread_id"))
+        if not isinstance(m, dict):
+            continue
+        if status and m.get("status") != status:
+            continue
+        if tag and tag not in (m.get("tags") or []):
+            continue
+        kept.append(thread)
+    return kept, failed, len(lookups)
 
 
 # ═════════════════════════════════════════════════════════════════════════════
@@ -404,7 +1065,7 @@ def get_thread_messages(
 
 
 @mcp.tool()
-def send_email(
+async def send_email(
     to: str,
     subject: str,
     html: Optional[str] = None,
@@ -420,8 +1081,9 @@ def send_email(
 
     Provide html or text (or both) for the body.
     To reply in an existing thread, pass thread_id.
-    To attach files, first call upload_attachment, then pass
-    the attachment IDs as a comma-separated string.
+    To attach files, first call upload_attachment (or upload_attachment_file /
+    the chunked upload tools), then pass the attachment IDs as a
+    comma-separated string.
 
     You only need inbox_id to send — the domain is inferred automatically.
 
@@ -437,6 +1099,25 @@ def send_email(
         domain_id: Send from a specific domain (optional, inferred from inbox_id)
         attachments: Comma-separated attachment IDs from upload_attachment (optional)
     """
+    payload = _message_payload(
+        to, subject, html, text, from_address, reply_to, thread_id, inbox_id, domain_id, attachments
+    )
+    return _fmt(await _post("/v1/messages/send", payload))
+
+
+def _message_payload(
+    to: str,
+    subject: str,
+    html: Optional[str] = None,
+    text: Optional[str] = None,
+    from_address: Optional[str] = None,
+    reply_to: Optional[str] = None,
+    thread_id: Optional[str] = None,
+    inbox_id: Optional[str] = None,
+    domain_id: Optional[str] = None,
+    attachments: Optional[str] = None,
+) -> dict[str, Any]:
+    """Build a /v1/messages/send body from send_email-style arguments."""
     # Parse comma-separated to into list
     to_list = [addr.strip() for addr in to.split(",") if addr.strip()]
 
@@ -462,8 +1143,220 @@ def send_email(
         payload["attachments"] = [
             a.strip() for a in attachments.split(",") if a.strip()
         ]
+    return payload
+
 
-    return _fmt(_post("/v1/messages/send", payload))
+# ── Bulk send ────────────────────────────────────────────────────────────────
+
+
+def _render_message(spec: dict[str, Any], recipient: dict[str, Any]) -> dict[str, Any]:
+    """Fill a bulk job's templates for one recipient and build the send payload."""
+    return _message_payload(
+        recipient["email"],
+        mailmerge.render(spec["subject"], recipient),
+        mailmerge.render(spec["html"], recipient, escape=True) if spec.get("html") else None,
+        mailmerge.render(spec["text"], recipient) if spec.get("text") else None,
+        spec.get("from_address"),
+        spec.get("reply_to"),
+        None,
+        spec.get("inbox_id"),
+        spec.get("domain_id"),
+        spec.get("attachments"),
+    )
+
+
+async def _send_recipient(job_id: str, spec: dict[str, Any], idx: int, recipient: dict[str, Any]) -> None:
+    """Send one bulk job message and record the outcome.
+
+    Rate limiting and open breakers leave the recipient pending (nothing was
+    sent), so a resume picks them up; other errors mark it failed.
+    """
+    try:
+        payload = _render_message(spec, recipient)
+    except mailmerge.MissingVariable as exc:
+        await _bulk_jobs.mark(job_id, idx, mailmerge.FAILED, error=str(exc))
+        return
+    await _bulk_jobs.mark(job_id, idx, mailmerge.SENDING)
+    for attempt in range(3):
+        try:
+            result = await _post("/v1/messages/send", payload)
+        except RateLimited as exc:
+            if attempt < 2:
+                await asyncio.sleep(exc.retry_after)
+                continue
+            await _bulk_jobs.mark(job_id, idx, mailmerge.PENDING)
+        except CircuitOpen:
+            await _bulk_jobs.mark(job_id, idx, mailmerge.PENDING)
+        except Exception as exc:
+            await _bulk_jobs.mark(job_id, idx, mailmerge.FAILED, error=_error_summary(exc))
+        else:
+            message_id = result.get("message_id") if isinstance(result, dict) else None
+            await _bulk_jobs.mark(job_id, idx, mailmerge.SENT, message_id=message_id)
+        return
+
+
+async def _run_bulk_send(
+    job_id: str,
+    spec: dict[str, Any],
+    statuses: tuple[str, ...],
+    ctx: Optional[Context],
+    owner: str,
+) -> str:
+    """Send to every recipient of a job in `statuses`, recording each outcome as it lands.
+
+    The caller has claimed the job for `owner`; it is released when done.
+    """
+
+    async def beat() -> None:
+        while True:
+            await asyncio.sleep(BULK_HEARTBEAT)
+            try:
+                await _bulk_jobs.heartbeat(job_id, owner)
+            except Exception as exc:
+                logger.warning("Heartbeat of bulk send job %s failed: %s", job_id, exc)
+
+    heartbeat = asyncio.ensure_future(beat())
+    try:
+        await _send_bulk_todo(job_id, spec, statuses, ctx)
+    finally:
+        heartbeat.cancel()
+        await _bulk_jobs.release(job_id, owner)
+    return _fmt(await _bulk_jobs.summary(job_id))
+
+
+async def _send_bulk_todo(
+    job_id: str,
+    spec: dict[str, Any],
+    statuses: tuple[str, ...],
+    ctx: Optional[Context],
+) -> None:
+    todo = await _bulk_jobs.todo(job_id, statuses)
+    done = 0
+    step = max(1, len(todo) // 100)
+
+    async def send_one(item: tuple[int, dict[str, Any]]) -> None:
+        nonlocal done
+        try:
+            await _send_recipient(job_id, spec, *item)
+        finally:
+            done += 1
+            if ctx is not None and (done % step == 0 or done == len(todo)):
+                await ctx.report_progress(done, len(todo), f"{done}/{len(todo)} recipients processed")
+
+    await _run_bulk(todo, send_one, BULK_CONCURRENCY)
+
+
+@mcp.tool()
+async def bulk_send_email(
+    subject: str,
+    html: Optional[str] = None,
+    text: Optional[str] = None,
+    # Not plain `str`: FastMCP decodes JSON-looking strings before validation
+    recipients: Optional[Union[str, dict[str, Any], list[Union[str, dict[str, Any]]]]] = None,
+    recipients_file: Optional[str] = None,
+    from_address: Optional[str] = None,
+    reply_to: Optional[str] = None,
+    inbox_id: Optional[str] = None,
+    domain_id: Optional[str] = None,
+    attachments: Optional[str] = None,
+    dry_run: bool = False,
+    ctx: Optional[Context] = None,
+) -> str:
+    """Send a personalized email to many recipients in one call (mail merge).
+
+    subject, html and text are templates: {{name}} is replaced with each
+    recipient's "name" value ({{company.name}} reaches into nested objects).
+    Every recipient gets their own message; sends run concurrently within
+    the API key's rate limit.
+
+    Returns a job summary: job_id, total, sent, pending, failed (with
+    errors) and complete. If the call is interrupted or some sends fail,
+    continue with resume_bulk_send(job_id) — nobody is emailed twice.
+    Use dry_run=true first to preview rendered messages and catch missing
+    variables without sending anything.
+
+    Args:
+        subject: Subject template, e.g. "Your order {{order_id}} has shipped"
+        html: HTML body template (values are HTML-escaped)
+        text: Plain text body template
+        recipients: Recipients inline — an array of objects with an "email"
+                    field plus template variables (or of plain addresses),
+                    or the same as JSON Lines or CSV text with a header row
+        recipients_file: Path to a .csv, .jsonl or .json recipients file on
+                         the machine running this server (instead of recipients)
+        from_address: Sender address (optional, uses inbox default)
+        reply_to: Reply-to address (optional)
+        inbox_id: Send from a specific inbox (recommended)
+        domain_id: Send from a specific domain (optional, inferred from inbox_id)
+        attachments: Comma-separated attachment IDs sent to every recipient (optional)
+        dry_run: Render and validate only; nothing is sent (default: false)
+    """
+    if not html and not text:
+        raise ValueError("Provide an html or text template")
+    if (recipients is None) == (recipients_file is None):
+        raise ValueError("Provide exactly one of recipients or recipients_file")
+    if recipients_file is not None:
+        rows = await asyncio.to_thread(mailmerge.read_recipients_file, _local_path(recipients_file))
+    else:
+        rows = mailmerge.parse_recipients(recipients)
+    if not rows:
+        raise ValueError("No recipients")
+    if len(rows) > MAX_BULK_RECIPIENTS:
+        raise ValueError(f"{len(rows)} recipients exceeds the limit of {MAX_BULK_RECIPIENTS} per job")
+
+    spec = {
+        "subject": subject, "html": html, "text": text, "from_address": from_address,
+        "reply_to": reply_to, "inbox_id": inbox_id, "domain_id": domain_id, "attachments": attachments,
+    }
+    if dry_run:
+        previews, errors = [], []
+        for row in rows:
+            try:
+                payload = _render_message(spec, row)
+            except mailmerge.MissingVariable as exc:
+                errors.append({"email": row["email"], "error": str(exc)})
+                continue
+            if len(previews) < 3:
+                previews.append(payload)
+        return _fmt({"total": len(rows), "preview": previews, "errors": errors[:100], "error_count": len(errors)})
+
+    owner = secrets.token_hex(8)
+    job_id = await _bulk_jobs.create(tenant_id(_api_key_ctx.get()), spec, rows, owner)
+    return await _run_bulk_send(job_id, spec, (mailmerge.PENDING,), ctx, owner)
+
+
+@mcp.tool()
+async def resume_bulk_send(job_id: str, retry_failed: bool = False, ctx: Optional[Context] = None) -> str:
+    """Continue a bulk_send_email job that was interrupted or partly failed.
+
+    Sends to recipients not yet sent. With retry_failed=true it also retries
+    failed recipients and those whose send was in flight when the server
+    stopped (those may already have received the email).
+
+    Args:
+        job_id: The job_id returned by bulk_send_email
+        retry_failed: Also retry failed and uncertain recipients (default: false)
+    """
+    spec = await _bulk_jobs.spec(tenant_id(_api_key_ctx.get()), job_id)
+    if spec is None:
+        raise ValueError(f"Unknown bulk send job: {job_id}")
+    owner = secrets.token_hex(8)
+    if not await _bulk_jobs.claim(job_id, owner):
+        raise ValueError(f"Bulk send job {job_id} is still running")
+    statuses = (mailmerge.PENDING, mailmerge.FAILED, mailmerge.SENDING) if retry_failed else (mailmerge.PENDING,)
+    return await _run_bulk_send(job_id, spec, statuses, ctx, owner)
+
+
+@mcp.tool()
+async def get_bulk_send_status(job_id: str) -> str:
+    """Get the progress and failures of a bulk_send_email job.
+
+    Args:
+        job_id: The job_id returned by bulk_send_email
+    """
+    if await _bulk_jobs.spec(tenant_id(_api_key_ctx.get()), job_id) is None:
+        raise ValueError(f"Unknown bulk send job: {job_id}")
+    return _fmt(await _bulk_jobs.summary(job_id))
 
 
 # ═════════════════════════════════════════════════════════════════════════════
@@ -472,30 +1365,190 @@ def send_email(
 
 
 @mcp.tool()
-def upload_attachment(
+async def upload_attachment(
     content: str,
     filename: str,
     mime_type: str,
+    dedupe: bool = True,
 ) -> str:
     """Upload a file for use when sending emails.
 
     Returns an attachment_id to pass to send_email's attachments parameter.
+    Uploading the same file again returns the earlier attachment_id without
+    re-sending it ("deduplicated": true).
+    For larger files use upload_attachment_file (local path) or
+    begin_attachment_upload (chunked) instead.
 
     Args:
         content: Base64-encoded file content
         filename: Original filename, e.g. "report.pdf"
         mime_type: MIME type, e.g. "application/pdf" or "image/png"
+        dedupe: Reuse an earlier upload of identical content (default: true)
     """
-    return _fmt(
-        _post(
-            "/v1/attachments/upload",
-            {"content": content, "filename": filename, "mime_type": mime_type},
-        )
+    sha256 = None
+    if dedupe and ATTACHMENT_DEDUPE_TTL > 0:
+        try:
+            sha256 = hashlib.sha256(base64.b64decode(content)).hexdigest()
+        except binascii.Error:
+            pass  # let the API report malformed content
+        else:
+            hit = await _attachments.lookup_upload(tenant_id(_api_key_ctx.get()), sha256, filename, mime_type)
+            if hit is not None:
+                return _fmt({**hit, "deduplicated": True})
+    result = await _post(
+        "/v1/attachments/upload",
+        {"content": content, "filename": filename, "mime_type": mime_type},
     )
+    await _remember_upload(sha256, filename, mime_type, result)
+    return _fmt(result)
+
+
+async def _remember_upload(sha256: Optional[str], filename: str, mime_type: str, result: Any) -> None:
+    """Record an upload in the dedupe index."""
+    if sha256 and ATTACHMENT_DEDUPE_TTL > 0 and isinstance(result, dict) and result.get("attachment_id"):
+        await _attachments.remember_upload(tenant_id(_api_key_ctx.get()), sha256, filename, mime_type, result)
+
+
+def _local_path(path: str) -> str:
+    """Resolve a local file path a tool may read, enforcing COMMUNE_UPLOAD_ROOTS."""
+    resolved = os.path.realpath(os.path.expanduser(path))
+    if UPLOAD_ROOTS:
+        if not any(os.path.commonpath([resolved, root]) == root for root in UPLOAD_ROOTS):
+            raise ValueError(f"{path} is outside the allowed directories (COMMUNE_UPLOAD_ROOTS)")
+    elif _local_files_restricted:
+        raise ValueError(
+            "Reading local files is disabled on this server; pass the data inline "
+            "or ask the operator to set COMMUNE_UPLOAD_ROOTS"
+        )
+    if not os.path.isfile(resolved):
+        raise ValueError(f"No such file: {path}")
+    return resolved
+
+
+async def _upload_file(
+    path: str,
+    filename: str,
+    mime_type: str,
+    dedupe: bool = True,
+    sha256: Optional[str] = None,
+) -> dict[str, Any]:
+    """Stream a local file to the upload endpoint without loading it into memory.
+
+    With `dedupe`, identical content uploaded before is answered from the
+    local index instead; `sha256` skips hashing the file when already known.
+    """
+    body = FileBody(path, {"filename": filename, "mime_type": mime_type})
+    if body.size > MAX_UPLOAD_BYTES:
+        raise ValueError(f"File is {body.size} bytes; the limit is {MAX_UPLOAD_BYTES} (COMMUNE_MAX_UPLOAD_BYTES)")
+    if dedupe and ATTACHMENT_DEDUPE_TTL > 0:
+        sha256 = sha256 or await file_sha256(path)
+        hit = await _attachments.lookup_upload(tenant_id(_api_key_ctx.get()), sha256, filename, mime_type)
+        if hit is not None:
+            return {**hit, "deduplicated": True}
+    headers = {**_headers(), "Content-Length": str(body.content_length)}
+    result = await _request("POST", "/v1/attachments/upload", headers=headers, body=body)
+    if isinstance(result, dict):
+        result = {**result, "sha256": body.sha256, "size_bytes": body.size}
+    await _remember_upload(body.sha256, filename, mime_type, result)
+    return result
+
+
+async def _pending_upload(upload_id: str) -> dict[str, Any]:
+    upload = await _uploads.get(tenant_id(_api_key_ctx.get()), upload_id)
+    if upload is None:
+        raise ValueError(f"Unknown or expired upload_id: {upload_id}")
+    return upload
+
+
+@mcp.tool()
+async def upload_attachment_file(
+    path: str,
+    filename: Optional[str] = None,
+    mime_type: Optional[str] = None,
+    dedupe: bool = True,
+) -> str:
+    """Upload a local file for use when sending emails, streaming it from disk.
+
+    Preferred over upload_attachment for anything but small files: the file
+    never has to pass through the conversation as base64.
+    Returns an attachment_id plus the file's sha256 and size. Uploading the
+    same file again returns the earlier attachment_id ("deduplicated": true).
+
+    Args:
+        path: Path of the file on the machine running this server
+        filename: Filename shown to recipients (default: the file's name)
+        mime_type: MIME type (default: guessed from the filename)
+        dedupe: Reuse an earlier upload of identical content (default: true)
+    """
+    resolved = _local_path(path)
+    filename = filename or os.path.basename(resolved)
+    mime_type = mime_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    return _fmt(await _upload_file(resolved, filename, mime_type, dedupe))
 
 
 @mcp.tool()
-def get_attachment_url(attachment_id: str, expires_in: int = 3600) -> str:
+async def begin_attachment_upload(filename: str, mime_type: str) -> str:
+    """Start a chunked attachment upload, for files too large for one upload_attachment call.
+
+    Send the file with append_attachment_chunk, then call
+    finish_attachment_upload to get the attachment_id. Unfinished uploads
+    expire after an hour.
+
+    Args:
+        filename: Original filename, e.g. "report.pdf"
+        mime_type: MIME type, e.g. "application/pdf"
+    """
+    await _uploads.expire()
+    upload_id = await _uploads.begin(tenant_id(_api_key_ctx.get()), filename, mime_type, MAX_PENDING_UPLOADS)
+    if upload_id is None:
+        raise ValueError(f"{MAX_PENDING_UPLOADS} uploads already in progress for this API key — finish or wait for some to expire")
+    return _fmt({"upload_id": upload_id, "max_bytes": MAX_UPLOAD_BYTES})
+
+
+@mcp.tool()
+async def append_attachment_chunk(upload_id: str, chunk: str) -> str:
+    """Append the next piece of a chunked upload.
+
+    Args:
+        upload_id: ID from begin_attachment_upload
+        chunk: Base64-encoded bytes of the next piece, in order (e.g. 1 MB of file data)
+    """
+    upload = await _pending_upload(upload_id)
+    try:
+        data = base64.b64decode(chunk, validate=True)
+    except binascii.Error as exc:
+        raise ValueError(f"chunk is not valid base64: {exc}") from exc
+    if upload["size"] + len(data) > MAX_UPLOAD_BYTES:
+        raise ValueError(f"Upload would exceed {MAX_UPLOAD_BYTES} bytes (COMMUNE_MAX_UPLOAD_BYTES)")
+    if not await _uploads.append(tenant_id(_api_key_ctx.get()), upload_id, upload["size"], data):
+        raise ValueError(f"Upload {upload_id} is finishing or took another chunk meanwhile; send chunks one at a time")
+    return _fmt({"upload_id": upload_id, "received_bytes": upload["size"] + len(data)})
+
+
+@mcp.tool()
+async def finish_attachment_upload(upload_id: str) -> str:
+    """Complete a chunked upload and send the file to Commune.
+
+    Returns an attachment_id to pass to send_email's attachments parameter,
+    plus the file's sha256 and size.
+
+    Args:
+        upload_id: ID from begin_attachment_upload
+    """
+    upload = await _uploads.claim(tenant_id(_api_key_ctx.get()), upload_id)  # no appends while it is sent
+    if upload is None:
+        raise ValueError(f"Unknown or expired upload_id: {upload_id}")
+    try:
+        result = await _upload_file(upload["path"], upload["filename"], upload["mime_type"])
+    except Exception:
+        await _uploads.release(upload_id)  # keep the data so the caller can retry
+        raise
+    await _uploads.discard(upload_id)
+    return _fmt(result)
+
+
+@mcp.tool()
+async def get_attachment_url(attachment_id: str, expires_in: int = 3600) -> str:
     """Get a temporary download URL for an attachment.
 
     Args:
@@ -503,24 +1556,83 @@ def get_attachment_url(attachment_id: str, expires_in: int = 3600) -> str:
         expires_in: URL lifetime in seconds (default: 3600 = 1 hour)
     """
     return _fmt(
-        _get(
+        await _get(
             f"/v1/attachments/{attachment_id}/url",
             {"expires_in": expires_in},
         )
     )
 
 
+@mcp.tool()
+async def download_attachment(attachment_id: str, refresh: bool = False) -> str:
+    """Download an attachment to the local cache and return its file path.
+
+    Repeat calls for the same attachment are served from disk. The cache is
+    bounded in size and evicts the least recently used files first.
+    Returns path, sha256, size_bytes, filename, mime_type and whether it
+    came from the cache. On the HTTP server, whose callers cannot read its
+    disk, nothing is downloaded: returns a temporary url, filename,
+    mime_type and size instead.
+
+    Args:
+        attachment_id: The attachment ID
+        refresh: Download again even if cached (default: false)
+    """
+    if _local_files_restricted:
+        info = await _get(f"/v1/attachments/{attachment_id}/url", {"expires_in": 3600})
+        return _fmt({"attachment_id": attachment_id, **info, "downloaded": False})
+
+    tenant = tenant_id(_api_key_ctx.get())
+    if not refresh:
+        hit = await _attachments.cached_download(tenant, attachment_id)
+        if hit is not None:
+            return _fmt({"attachment_id": attachment_id, **hit, "cached": True})
+
+    info = await _get(f"/v1/attachments/{attachment_id}/url", {"expires_in": 300})
+    if info.get("size") and info["size"] > ATTACHMENT_CACHE_BYTES:
+        raise ValueError(f"Attachment is {info['size']} bytes, larger than the download cache (COMMUNE_ATTACHMENT_CACHE_BYTES)")
+    temp_path = _attachments.temp_path()
+    try:
+        sha256, size = await _download_to(info["url"], temp_path)
+        result = await _attachments.store_download(
+            tenant, attachment_id, temp_path, sha256, size, info.get("filename"), info.get("mime_type")
+        )
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return _fmt({"attachment_id": attachment_id, **result, "cached": False})
+
+
+async def _download_to(url: str, path: str) -> tuple[str, int]:
+    """Stream a (pre-signed) URL into a file, hashing it on the way; no API key is sent."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "wb") as f:
+        with upstream_timer():
+            async with _get_client().stream("GET", url, follow_redirects=True) as resp:
+                resp.raise_for_status()
+                async for chunk in resp.aiter_bytes():
+                    size += len(chunk)
+                    if size > ATTACHMENT_CACHE_BYTES:
+                        raise ValueError("Attachment is larger than the download cache (COMMUNE_ATTACHMENT_CACHE_BYTES)")
+                    digest.update(chunk)
+                    await asyncio.to_thread(f.write, chunk)
+    return digest.hexdigest(), size
+
+
 # ═════════════════════════════════════════════════════════════════════════════
 # SEARCH TOOLS
 # ═════════════════════════════════════════════════════════════════════════════
 
 
 @mcp.tool()
-def search_threads(
+async def search_threads(
     query: str,
     inbox_id: Optional[str] = None,
     domain_id: Optional[str] = None,
     limit: int = 20,
+    fields: Optional[str] = None,
 ) -> str:
     """Search across email threads by subject or content.
 
@@ -532,13 +1644,343 @@ def search_threads(
         inbox_id: Filter by inbox (recommended)
         domain_id: Filter by domain
         limit: Max results, 1-100 (default: 20)
+        fields: Comma-separated fields to return per thread (optional),
+                e.g. "thread_id,subject,snippet"
     """
     params: dict[str, Any] = {"q": query, "limit": limit}
     if inbox_id:
         params["inbox_id"] = inbox_id
     if domain_id:
         params["domain_id"] = domain_id
-    return _fmt(_get("/v1/search/threads", params))
+    return _fmt(await _get("/v1/search/threads", params), fields)
+
+
+# ── Local mirror ─────────────────────────────────────────────────────────────
+
+
+async def _sync_thread(tenant: str, inbox_id: str, thread: dict[str, Any]) -> int:
+    """Fetch a thread's messages newer than the mirrored ones and store them."""
+    thread_id = thread["thread_id"]
+    known = await _mirror.message_ids(tenant, thread_id)
+    fresh: list[dict[str, Any]] = []
+    params: dict[str, Any] = {"limit": 100, "order": "desc"}
+    while True:
+        page = await _request("GET", f"/v1/threads/{thread_id}/messages", params=params, envelope=True)
+        messages = (page.get("data") or []) if isinstance(page, dict) else page
+        new = [m for m in messages if m.get("message_id") and m["message_id"] not in known]
+        fresh.extend(new)
+        # Newest first: a page holding an already-mirrored message reaches the old ones
+        cursor = page.get("next_cursor") if isinstance(page, dict) and page.get("has_more") else None
+        if len(new) < len(messages) or not cursor:
+            break
+        params = {**params, "cursor": cursor}
+    await _mirror.store_thread(tenant, inbox_id, thread, fresh)
+    return len(fresh)
+
+
+async def _sync_inbox(inbox_id: str, max_pages: int, full: bool) -> dict[str, Any]:
+    """Bring the mirror of one inbox up to date.
+
+    Threads are walked newest activity first and only threads whose
+    last_message_at changed are refetched; the walk stops at the first page
+    with no changes. An initial sync, or an incremental one with more
+    changed pages than the page budget, leaves a cursor and later syncs
+    continue from there; until a catch-up finishes, synced_at stays put so
+    the next search refreshes again.
+    """
+    tenant = tenant_id(_api_key_ctx.get())
+    state = await _mirror.state(tenant, inbox_id) or {"backfill_cursor": None, "catchup": [], "retry": []}
+    versions = {} if full else await _mirror.versions(tenant, inbox_id)
+    changed: dict[str, dict[str, Any]] = {t["thread_id"]: t for t in state["retry"]}
+    budget = max(1, max_pages)
+    pages = 0
+
+    async def walk(params: dict[str, Any], stop_when_unchanged: bool) -> Optional[str]:
+        """Scan thread pages; returns the cursor to continue from if the budget ran out."""
+        nonlocal pages
+        while pages < budget:
+            page = await _request("GET", "/v1/threads", params=params, envelope=True)
+            pages += 1
+            page_changed = False
+            for thread in page.get("data") or []:
+                if versions.get(thread.get("thread_id"), "") != thread.get("last_message_at"):
+                    changed[thread["thread_id"]] = thread
+                    page_changed = True
+            cursor = page.get("next_cursor") if page.get("has_more") else None
+            if not cursor or (stop_when_unchanged and not page_changed):
+                return None
+            params = {**params, "cursor": cursor}
+        return params.get("cursor")
+
+    base = {"inbox_id": inbox_id, "limit": 100, "order": "desc"}
+    backfill = state["backfill_cursor"]
+    catchup: list[str] = []
+    if full or not versions:
+        backfill = await walk(base, stop_when_unchanged=False)
+    else:
+        # Changed pages beyond the budget are resumed from their cursor on later
+        # syncs, newest first, after the newest pages are checked again
+        catchup = [c for c in [await walk(base, stop_when_unchanged=True)] if c] + state["catchup"]
+        while catchup and pages < budget:
+            cursor = await walk({**base, "cursor": catchup[0]}, stop_when_unchanged=True)
+            catchup = ([cursor] if cursor else []) + catchup[1:]
+        catchup = catchup[:MIRROR_MAX_CATCHUPS]
+        if not catchup and backfill and pages < budget:
+            backfill = await walk({**base, "cursor": backfill}, stop_when_unchanged=False)
+
+    threads = list(changed.values())
+    added = 0
+
+    async def sync_one(thread: dict[str, Any]) -> None:
+        nonlocal added
+        count = await _sync_thread(tenant, inbox_id, thread)
+        added += count
+
+    errors = await _run_bulk(threads, sync_one)
+    failed = [(t, exc) for t, exc in zip(threads, errors) if exc is not None]
+    # Retry failed threads next time, unless they are gone
+    retry = [
+        t for t, exc in failed
+        if not (isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code == 404)
+    ]
+    await _mirror.save_state(tenant, inbox_id, backfill, catchup, retry)
+    return {
+        "inbox_id": inbox_id,
+        "pages": pages,
+        "threads_updated": len(threads) - len(failed),
+        "messages_added": added,
+        "failed": [{"thread_id": t["thread_id"], "error": _error_summary(exc)} for t, exc in failed[:20]],
+        "backfill_complete": backfill is None,
+        "up_to_date": not catchup,
+        **await _mirror.stats(tenant, inbox_id),
+    }
+
+
+def _epoch_or_none(value: Optional[str]) -> Optional[float]:
+    ts = _parse_ts(value)
+    return ts.timestamp() if ts else None
+
+
+def _sync_mirror(inbox_id: str, max_pages: int = 50, full: bool = False) -> Awaitable[dict[str, Any]]:
+    key = (_api_key_ctx.get(), inbox_id)
+    return _mirror_syncs.do(key, lambda: _sync_inbox(inbox_id, max_pages, full))
+
+
+@mcp.tool()
+async def sync_mirror(inbox_id: str, max_pages: int = 50, full: bool = False) -> str:
+    """Copy an inbox's threads and messages into the local search mirror.
+
+    The first call downloads the inbox (up to max_pages pages of 100
+    threads; call again to continue a large inbox). Later calls are
+    incremental: only threads with new activity are fetched, so an
+    unchanged inbox costs a single API call. Then use search_mirror.
+
+    Args:
+        inbox_id: The inbox to mirror
+        max_pages: Maximum pages of 100 threads to scan this call (default: 50)
+        full: Rescan every thread instead of stopping at unchanged ones (default: false)
+    """
+    return _fmt(await _sync_mirror(inbox_id, max_pages, full))
+
+
+@mcp.tool()
+async def search_mirror(
+    query: str,
+    inbox_id: Optional[str] = None,
+    direction: Optional[str] = None,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> str:
+    """Full-text search of messages in the local mirror (see sync_mirror).
+
+    Much faster than search_threads and not limited to 100 results: page
+    with offset. Every word must match (stemmed, so "refunds" finds
+    "refund"); end a word with * to match a prefix, e.g. "invoic*".
+    Returns matching messages, best first, with thread_id, message_id,
+    sender, subject and a snippet with matches in [brackets]. Inboxes that
+    were synced more than COMMUNE_MIRROR_MAX_AGE seconds ago are refreshed
+    incrementally first.
+
+    Args:
+        query: Words to search for in subjects, bodies and sender addresses
+        inbox_id: Only this inbox (optional; default: every mirrored inbox)
+        direction: Only "inbound" or "outbound" messages (optional)
+        after: Only messages sent at or after this ISO date/time
+        before: Only messages sent before this ISO date/time
+        limit: Results per page, 1-500 (default: 20)
+        offset: Results to skip, for the next page (default: 0)
+    """
+    tenant = tenant_id(_api_key_ctx.get())
+    synced = await _mirror.synced_inboxes(tenant)
+    if inbox_id and inbox_id not in synced:
+        raise ValueError(f"Inbox {inbox_id} is not mirrored yet; call sync_mirror(inbox_id) first")
+    if not synced:
+        raise ValueError("No inbox is mirrored yet; call sync_mirror(inbox_id) first")
+
+    inboxes = [inbox_id] if inbox_id else list(synced)
+    if MIRROR_MAX_AGE > 0:
+        stale = [i for i in inboxes if time.time() - (synced[i] or 0) > MIRROR_MAX_AGE]
+        errors = await _run_bulk(stale, lambda i: _sync_mirror(i))
+        for i, exc in zip(stale, errors):
+            if exc is not None:
+                logger.warning("Mirror refresh of %s failed, searching stale data: %s", i, _error_summary(exc))
+        synced = await _mirror.synced_inboxes(tenant)
+
+    limit = max(1, min(limit, 500))
+    hits = await _mirror.search(
+        tenant, query, inbox_id, direction,
+        _epoch_or_none(after), _epoch_or_none(before), limit, max(0, offset),
+    )
+    return _fmt({
+        "data": hits,
+        "next_offset": offset + limit if len(hits) == limit else None,
+        "synced_at": {
+            i: datetime.fromtimestamp(synced[i], timezone.utc).isoformat() if synced.get(i) else None
+            for i in inboxes
+        },
+    })
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# NEW MAIL TOOLS (webhook events)
+# ═════════════════════════════════════════════════════════════════════════════
+
+
+async def ingest_mail_event(payload: dict[str, Any]) -> Optional[dict[str, Any]]:
+    """Handle a verified Commune webhook payload.
+
+    Marks the inbox's mirror stale, makes its wait_for_new_messages
+    watchers poll now, wakes wait_for_new_mail callers and notifies
+    subscribed sessions. Returns the
+    normalized event, or None if the payload names no inbox or is a
+    redelivery.
+    """
+    event = mailevents.parse_event(payload)
+    if event is None:
+        return None
+    inbox_id = event["inbox_id"]
+    await _mirror.mark_stale(inbox_id)
+    _watchers.poke(lambda key: key[1] == inbox_id)  # wait_for_new_messages pollers check now
+    if not _mail_feed.publish(inbox_id, event):
+        return None
+
+    sessions = list(_mail_subscribers.get(inbox_id, ()))
+
+    async def notify(session: ServerSession) -> None:
+        try:
+            await session.send_log_message("info", event, logger="commune.new_mail")
+        except Exception:
+            _mail_subscribers.get(inbox_id, weakref.WeakSet()).discard(session)  # session has gone away
+
+    await asyncio.gather(*(notify(s) for s in sessions))
+    return event
+
+
+async def _owned_inbox(inbox_id: str) -> None:
+    """Refuse inboxes the caller's API key can't see; webhook events are not tenant-scoped."""
+    inboxes = await _get("/v1/inboxes", ttl=CACHE_TTL_INBOXES)
+    if not any(isinstance(i, dict) and inbox_id in (i.get("id"), i.get("inbox_id")) for i in inboxes or []):
+        raise ValueError(f"Unknown inbox: {inbox_id}")
+
+
+def _require_webhooks() -> None:
+    if not _webhook_receiver:
+        raise ValueError(
+            "New-mail events need the HTTP server with COMMUNE_WEBHOOK_SECRET set, "
+            "and the inbox's webhook pointed at its webhook route (COMMUNE_WEBHOOK_PATH)"
+        )
+
+
+@mcp.tool()
+async def wait_for_new_mail(inbox_id: str, cursor: Optional[str] = None, timeout: int = 60) -> str:
+    """Wait until new mail arrives in an inbox, instead of polling list_threads.
+
+    Blocks up to `timeout` seconds and returns as soon as Commune reports
+    a new message (pushed by webhook, no API calls while waiting). Returns
+    {"events": [{thread_id, message_id, from, subject, ...}], "cursor": ...};
+    events is empty on timeout. Pass the returned cursor to the next call
+    so nothing that arrives in between is missed.
+
+    Args:
+        inbox_id: The inbox to watch
+        cursor: The cursor from the previous call (omit on the first call)
+        timeout: Seconds to wait, 1-300 (default: 60)
+    """
+    _require_webhooks()
+    await _owned_inbox(inbox_id)
+    timeout = max(1, min(timeout, MAX_WAIT_SECONDS))
+    events, next_cursor = await _mail_feed.wait(inbox_id, cursor, timeout)
+    return _fmt({"events": events, "cursor": next_cursor})
+
+
+@mcp.tool()
+async def wait_for_new_messages(inbox_id: str, cursor: Optional[str] = None, timeout: int = 60) -> str:
+    """Wait until a new thread or message appears in an inbox, then return only what changed.
+
+    Use this instead of calling list_threads in a loop and comparing
+    results. The server polls the inbox for you, backing off while it is
+    quiet, and all callers watching the same inbox share one poller. Works
+    without webhooks (see wait_for_new_mail for the push-based variant).
+
+    Returns {"threads": [...], "cursor": ...}: each thread summary has
+    "change" ("new_thread" or "new_message") and, for existing threads,
+    "new_messages". threads is empty on timeout. Pass the returned cursor
+    to the next call so nothing that changes in between is missed.
+
+    Args:
+        inbox_id: The inbox to watch
+        cursor: The cursor from the previous call (omit on the first call)
+        timeout: Seconds to wait, 1-300 (default: 60)
+    """
+    params = {"inbox_id": inbox_id, "limit": WATCH_PAGE_SIZE, "order": "desc"}
+
+    async def poll() -> list[dict[str, Any]]:
+        page = await _request("GET", "/v1/threads", params=params, envelope=True)
+        return (page.get("data") or []) if isinstance(page, dict) else []
+
+    watcher = _watchers.get((tenant_id(_api_key_ctx.get()), inbox_id), poll)
+    timeout = max(1, min(timeout, MAX_WAIT_SECONDS))
+    threads, next_cursor = await watcher.wait(cursor, timeout)
+    result: dict[str, Any] = {"threads": threads, "cursor": next_cursor}
+    if not threads and watcher.error is not None:
+        result["warning"] = f"Polling is failing, retrying: {_error_summary(watcher.error)}"
+    return _fmt(_truncate(result))
+
+
+@mcp.tool()
+async def subscribe_new_mail(inbox_id: str, ctx: Optional[Context] = None) -> str:
+    """Get a notification in this session whenever new mail arrives in an inbox.
+
+    Each new message is sent as a log notification from the
+    "commune.new_mail" logger, with the same fields wait_for_new_mail
+    returns. Lasts until unsubscribe_new_mail or the session ends.
+
+    Args:
+        inbox_id: The inbox to watch
+    """
+    _require_webhooks()
+    if ctx is None:
+        raise ValueError("subscribe_new_mail needs an MCP session")
+    await _owned_inbox(inbox_id)
+    _mail_subscribers.setdefault(inbox_id, weakref.WeakSet()).add(ctx.session)
+    return _fmt({"inbox_id": inbox_id, "subscribed": True})
+
+
+@mcp.tool()
+async def unsubscribe_new_mail(inbox_id: str, ctx: Optional[Context] = None) -> str:
+    """Stop new-mail notifications for an inbox in this session.
+
+    Args:
+        inbox_id: The inbox passed to subscribe_new_mail
+    """
+    subscribers = _mail_subscribers.get(inbox_id)
+    if ctx is not None and subscribers is not None:
+        subscribers.discard(ctx.session)
+        if not subscribers:
+            del _mail_subscribers[inbox_id]
+    return _fmt({"inbox_id": inbox_id, "subscribed": False})
 
 
 # ═════════════════════════════════════════════════════════════════════════════
@@ -547,17 +1989,17 @@ def search_threads(
 
 
 @mcp.tool()
-def get_thread_metadata(thread_id: str) -> str:
+async def get_thread_metadata(thread_id: str) -> str:
     """Get triage metadata for a thread: tags, status, and assignment.
 
     Args:
         thread_id: The thread ID
     """
-    return _fmt(_get(f"/v1/threads/{thread_id}/metadata"))
+    return _fmt(await _get(f"/v1/threads/{thread_id}/metadata"))
 
 
 @mcp.tool()
-def set_thread_status(
+async def set_thread_status(
     thread_id: str,
     status: str,
 ) -> str:
@@ -569,11 +2011,11 @@ def set_thread_status(
         thread_id: The thread ID
         status: New status — one of: open, needs_reply, waiting, closed
     """
-    return _fmt(_put(f"/v1/threads/{thread_id}/status", {"status": status}))
+    return _fmt(await _put(f"/v1/threads/{thread_id}/status", {"status": status}))
 
 
 @mcp.tool()
-def tag_thread(
+async def tag_thread(
     thread_id: str,
     tags: str,
 ) -> str:
@@ -586,11 +2028,11 @@ def tag_thread(
         tags: Comma-separated tags to add (e.g. "urgent,vip,sales-lead")
     """
     tag_list = [t.strip() for t in tags.split(",") if t.strip()]
-    return _fmt(_post(f"/v1/threads/{thread_id}/tags", {"tags": tag_list}))
+    return _fmt(await _post(f"/v1/threads/{thread_id}/tags", {"tags": tag_list}))
 
 
 @mcp.tool()
-def untag_thread(
+async def untag_thread(
     thread_id: str,
     tags: str,
 ) -> str:
@@ -601,11 +2043,11 @@ def untag_thread(
         tags: Comma-separated tags to remove (e.g. "urgent,vip")
     """
     tag_list = [t.strip() for t in tags.split(",") if t.strip()]
-    return _fmt(_delete_with_body(f"/v1/threads/{thread_id}/tags", {"tags": tag_list}))
+    return _fmt(await _delete_with_body(f"/v1/threads/{thread_id}/tags", {"tags": tag_list}))
 
 
 @mcp.tool()
-def assign_thread(
+async def assign_thread(
     thread_id: str,
     assigned_to: Optional[str] = None,
 ) -> str:
@@ -616,20 +2058,139 @@ def assign_thread(
         assigned_to: Agent/user identifier to assign to (empty or omit to unassign)
     """
     return _fmt(
-        _put(
+        await _put(
             f"/v1/threads/{thread_id}/assign",
             {"assigned_to": assigned_to if assigned_to else None},
         )
     )
 
 
+# ── Bulk triage ──────────────────────────────────────────────────────────────
+
+_TRIAGE_ACTIONS = ("tag", "untag", "status", "assign")
+
+
+async def _triage(thread_id: str, action: str, value: Any) -> Any:
+    """Apply one triage action to a thread via the /v1/threads/{id}/... endpoints."""
+    if action == "tag":
+        return await _post(f"/v1/threads/{thread_id}/tags", {"tags": _split_csv(value or "")})
+    if action == "untag":
+        return await _delete_with_body(
+            f"/v1/threads/{thread_id}/tags", {"tags": _split_csv(value or "")}
+        )
+    if action == "status":
+        return await _put(f"/v1/threads/{thread_id}/status", {"status": value})
+    if action == "assign":
+        return await _put(f"/v1/threads/{thread_id}/assign", {"assigned_to": value or None})
+    raise ValueError(f"Unknown triage action {action!r} — expected one of {', '.join(_TRIAGE_ACTIONS)}")
+
+
+async def _bulk_triage(operations: list[dict[str, Any]]) -> str:
+    """Run triage operations concurrently and summarize per-thread outcomes."""
+    for op in operations:
+        if not op.get("thread_id"):
+            raise ValueError("Every operation needs a thread_id")
+        if op.get("action") not in _TRIAGE_ACTIONS:
+            raise ValueError(
+                f"Unknown triage action {op.get('action')!r} — expected one of {', '.join(_TRIAGE_ACTIONS)}"
+            )
+
+    errors = await _run_bulk(
+        operations, lambda op: _triage(op["thread_id"], op["action"], op.get("value"))
+    )
+    failed = [
+        {"thread_id": op["thread_id"], "action": op["action"], "error": _error_summary(exc)}
+        for op, exc in zip(operations, errors)
+        if exc is not None
+    ]
+    return _fmt({
+        "total": len(operations),
+        "succeeded": len(operations) - len(failed),
+        "failed": failed,
+    })
+
+
+@mcp.tool()
+async def bulk_tag_threads(thread_ids: str, tags: str) -> str:
+    """Add the same tags to many threads in one call.
+
+    Runs the updates concurrently and returns a summary with the number
+    of threads updated and any per-thread failures.
+
+    Args:
+        thread_ids: Comma-separated thread IDs
+        tags: Comma-separated tags to add (e.g. "urgent,vip")
+    """
+    return await _bulk_triage(
+        [{"thread_id": t, "action": "tag", "value": tags} for t in _split_csv(thread_ids)]
+    )
+
+
+@mcp.tool()
+async def bulk_untag_threads(thread_ids: str, tags: str) -> str:
+    """Remove the same tags from many threads in one call.
+
+    Args:
+        thread_ids: Comma-separated thread IDs
+        tags: Comma-separated tags to remove (e.g. "urgent,vip")
+    """
+    return await _bulk_triage(
+        [{"thread_id": t, "action": "untag", "value": tags} for t in _split_csv(thread_ids)]
+    )
+
+
+@mcp.tool()
+async def bulk_set_thread_status(thread_ids: str, status: str) -> str:
+    """Set the same status on many threads in one call.
+
+    Valid statuses: "open", "needs_reply", "waiting", "closed"
+
+    Args:
+        thread_ids: Comma-separated thread IDs
+        status: New status — one of: open, needs_reply, waiting, closed
+    """
+    return await _bulk_triage(
+        [{"thread_id": t, "action": "status", "value": status} for t in _split_csv(thread_ids)]
+    )
+
+
+@mcp.tool()
+async def bulk_assign_threads(thread_ids: str, assigned_to: Optional[str] = None) -> str:
+    """Assign many threads to the same agent or user. Omit assigned_to to unassign.
+
+    Args:
+        thread_ids: Comma-separated thread IDs
+        assigned_to: Agent/user identifier to assign to (empty or omit to unassign)
+    """
+    return await _bulk_triage(
+        [{"thread_id": t, "action": "assign", "value": assigned_to} for t in _split_csv(thread_ids)]
+    )
+
+
+@mcp.tool()
+async def bulk_triage_threads(operations: list[dict[str, Any]]) -> str:
+    """Apply a different triage action to each thread in one call.
+
+    Use this to triage a backlog in a single step — e.g. close some threads,
+    tag others and assign the rest. Operations run concurrently; the result
+    lists how many succeeded and which ones failed.
+
+    Args:
+        operations: List of operations, each
+                    {"thread_id": "thr_123", "action": "tag" | "untag" | "status" | "assign", "value": ...}
+                    where value is comma-separated tags for tag/untag, a status
+                    for status, and an assignee (or null to unassign) for assign.
+    """
+    return await _bulk_triage(operations)
+
+
 # ═════════════════════════════════════════════════════════════════════════════
 # DELIVERABILITY TOOLS
 # ═════════════════════════════════════════════════════════════════════════════
 
 
 @mcp.tool()
-def get_deliverability_stats(
+async def get_deliverability_stats(
     inbox_id: Optional[str] = None,
     domain_id: Optional[str] = None,
     period: str = "7d",
@@ -649,11 +2210,11 @@ def get_deliverability_stats(
         params["inbox_id"] = inbox_id
     if domain_id:
         params["domain_id"] = domain_id
-    return _fmt(_get("/v1/delivery/metrics", params))
+    return _fmt(await _get("/v1/delivery/metrics", params))
 
 
 @mcp.tool()
-def get_suppressions(
+async def get_suppressions(
     inbox_id: Optional[str] = None,
     domain_id: Optional[str] = None,
     limit: int = 50,
@@ -673,11 +2234,11 @@ def get_suppressions(
         params["inbox_id"] = inbox_id
     if domain_id:
         params["domain_id"] = domain_id
-    return _fmt(_get("/v1/delivery/suppressions", params))
+    return _fmt(await _get("/v1/delivery/suppressions", params))
 
 
 @mcp.tool()
-def get_delivery_events(
+async def get_delivery_events(
     message_id: Optional[str] = None,
     inbox_id: Optional[str] = None,
     domain_id: Optional[str] = None,
@@ -704,7 +2265,7 @@ def get_delivery_events(
         params["domain_id"] = domain_id
     if event_type:
         params["event_type"] = event_type
-    return _fmt(_get("/v1/delivery/events", params))
+    return _fmt(await _get("/v1/delivery/events", params))
 
 
 # ═════════════════════════════════════════════════════════════════════════════
@@ -713,25 +2274,25 @@ def get_delivery_events(
 
 
 @mcp.tool()
-def get_credit_balance() -> str:
+async def get_credit_balance() -> str:
     """Get current credit balance for your Commune account.
 
     Returns included credits, purchased credits, total available, and credits used this billing cycle.
     """
-    return _fmt(_get("/v1/credits"))
+    return _fmt(await _get("/v1/credits"))
 
 
 @mcp.tool()
-def list_credit_bundles() -> str:
+async def list_credit_bundles() -> str:
     """List available credit bundles that can be purchased.
 
     Returns each bundle's ID, credit amount, price, and description.
     """
-    return _fmt(_get("/v1/credits/bundles"))
+    return _fmt(await _get("/v1/credits/bundles", ttl=CACHE_TTL_CREDIT_BUNDLES))
 
 
 @mcp.tool()
-def credits_checkout(bundle: str, return_url: Optional[str] = None) -> str:
+async def credits_checkout(bundle: str, return_url: Optional[str] = None) -> str:
     """Create a Stripe checkout session to purchase a credit bundle.
 
     Returns a checkout_url to open in the browser to complete payment.
@@ -744,14 +2305,14 @@ def credits_checkout(bundle: str, return_url: Optional[str] = None) -> str:
     payload: dict[str, Any] = {"bundle": bundle}
     if return_url:
         payload["return_url"] = return_url
-    return _fmt(_post("/v1/credits/checkout", payload))
+    return _fmt(await _post("/v1/credits/checkout", payload))
 
 
 # ─── Feedback ────────────────────────────────────────────────────────────────
 
 
 @mcp.tool()
-def submit_feedback(
+async def submit_feedback(
     type: Literal["error", "feature", "signal"],
     message: str,
     context: Optional[dict[str, Any]] = None,
@@ -795,7 +2356,69 @@ def submit_feedback(
     payload: dict[str, Any] = {"type": type, "message": message}
     if context:
         payload["context"] = context
-    return _fmt(_post("/v1/feedback", payload))
+    return _fmt(await _post("/v1/feedback", payload))
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# INSTRUMENTATION
+# ═════════════════════════════════════════════════════════════════════════════
+
+def _request_trace_context() -> Any:
+    """Trace context of the MCP HTTP request carrying the current tool call."""
+    try:
+        request = mcp.get_context().request_context.request
+    except (LookupError, ValueError):
+        return None
+    return tracing.context_from_scope(getattr(request, "scope", None))
+
+
+# Wrap every registered tool for /metrics and, when enabled, tracing
+for _tool in mcp._tool_manager.list_tools():
+    _tool.fn = instrument_tool(
+        _tool.name, tracing.trace_tool(_tool.name, _tool.fn, parent=_request_trace_context)
+    )
+
+
+def _pool_stats() -> dict[str, int]:
+    """Active/idle connection counts of the shared client's pool; empty if unavailable.
+
+    httpx has no public pool API, so this reads httpcore's pool through the
+    transport (checked against httpx 0.28 / httpcore 1.0). Any change in
+    those internals drops the gauge instead of breaking the scrape.
+    """
+    pool = getattr(getattr(_client, "_transport", None), "_pool", None)
+    connections = getattr(pool, "connections", None)
+    if not isinstance(connections, list):
+        return {}
+    try:
+        idle = sum(1 for c in connections if c.is_idle())
+    except Exception:
+        return {}
+    return {"active": len(connections) - idle, "idle": idle}
+
+
+def _collect_runtime_metrics():
+    """Scrape-time metrics read from the HTTP layer's live state."""
+    yield ("commune_mcp_http_pool_connections", "gauge",
+           "Connections in the shared Commune API connection pool.",
+           [({"state": state}, n) for state, n in _pool_stats().items()])
+    yield ("commune_mcp_http_pool_max_connections", "gauge",
+           "Configured connection pool size.", [({}, HTTP_MAX_CONNECTIONS)])
+    yield ("commune_mcp_upstream_retries_total", "counter",
+           "Upstream requests retried after a transient failure.", [({}, _retry_policy.retries)])
+    yield ("commune_mcp_rate_limited_total", "counter",
+           "Calls rejected by the client-side rate limiter.", [({}, _rate_limiter.rejected)])
+    yield ("commune_mcp_circuit_open", "gauge",
+           "1 if the endpoint family's circuit is open or half-open.",
+           [({"family": f, "state": b["state"]}, int(b["state"] != "closed"))
+            for f, b in _breakers.snapshot().items()])
+    yield ("commune_mcp_cache_entries", "gauge",
+           "Entries in the read-through cache.", [({}, len(_cache))])
+    yield ("commune_mcp_coalesced_in_flight", "gauge",
+           "Distinct GETs in flight behind the single-flight layer.", [({}, len(_inflight))])
+
+
+REGISTRY.add_collector(_collect_runtime_metrics)
 
 
 # ═════════════════════════════════════════════════════════════════════════════
@@ -821,6 +2444,7 @@ def main():
 
     if api_key:
         _api_key_ctx.set(api_key)
+    tracing.setup_tracing()
     mcp.run()
 
 
@@ -9,19 +9,69 @@ Smithery appends the api_key as a query parameter automatically.
 
 from __future__ import annotations
 
+import argparse
+import functools
+import hmac
+import importlib.util
+import logging
 import os
 from contextlib import asynccontextmanager
-from typing import AsyncIterator
+from typing import Any, AsyncIterator, Optional
 
 import uvicorn
-from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
 from starlette.applications import Starlette
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers, QueryParams
 from starlette.requests import Request
 from starlette.responses import JSONResponse, PlainTextResponse
 from starlette.routing import Mount, Route
-
-from commune_mcp.server import _api_key_ctx, mcp
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from commune_mcp import eventstore, jsonlib, mailevents, tracing
+from commune_mcp.metrics import REGISTRY
+from commune_mcp.sessions import SessionManager
+from commune_mcp.server import (
+    DATA_DIR,
+    _api_key_ctx,
+    _breakers,
+    close_http_client,
+    close_worker_state,
+    enable_webhook_receiver,
+    ingest_mail_event,
+    mcp,
+    open_http_client,
+    reset_worker_state,
+    restrict_local_files,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").lower() in ("1", "true", "yes")
+
+
+# Transport modes are read by create_app(), not at import, since main() sets them
+# for spawned workers after this module is loaded:
+#   COMMUNE_MCP_STATELESS      no server-side MCP sessions, so any worker or replica
+#                              can serve any request without sticky sessions
+#   COMMUNE_MCP_JSON_RESPONSE  answer POSTs with one application/json body instead
+#                              of an SSE stream
+
+# Stateful session limits: close sessions idle this long (0 = never), and cap
+# open sessions overall and per API key, evicting the least recently used
+SESSION_IDLE_TIMEOUT = float(os.environ.get("COMMUNE_MCP_SESSION_IDLE_TIMEOUT", "1800"))
+MAX_SESSIONS = int(os.environ.get("COMMUNE_MCP_MAX_SESSIONS", "10000"))
+MAX_SESSIONS_PER_KEY = int(os.environ.get("COMMUNE_MCP_MAX_SESSIONS_PER_KEY", "100"))
+
+# Inbound Commune webhooks: signing secrets (comma-separated, to allow rotation;
+# unset disables the route), the route path, and the largest body accepted
+WEBHOOK_SECRETS = [k.strip() for k in os.environ.get("COMMUNE_WEBHOOK_SECRET", "").split(",") if k.strip()]
+WEBHOOK_PATH = os.environ.get("COMMUNE_WEBHOOK_PATH", "/webhooks/commune")
+WEBHOOK_TOLERANCE = float(os.environ.get("COMMUNE_WEBHOOK_TOLERANCE", "300"))
+MAX_WEBHOOK_BYTES = 1024 * 1024
+
+# Bearer token scrapers must send to read /metrics; unset leaves the route unmounted
+METRICS_TOKEN = os.environ.get("COMMUNE_METRICS_TOKEN", "")
 
 # ── Well-known server card (Smithery discovery) ───────────────────────────────
 
@@ -45,33 +95,46 @@ _SERVER_CARD = {
 
 # ── Middleware ────────────────────────────────────────────────────────────────
 
-class _ApiKeyMiddleware(BaseHTTPMiddleware):
-    """Extract per-request Commune API key from query param or header."""
+class _ApiKeyMiddleware:
+    """Extract per-request Commune API key from query param or header.
+
+    Plain ASGI rather than BaseHTTPMiddleware: the scope is passed straight
+    through, so streaming SSE responses from the session manager are not
+    wrapped in extra tasks and memory streams.
+    """
+
+    # /metrics checks its own token rather than a Commune API key
+    EXEMPT = {"/health", "/.well-known/mcp/server-card.json", WEBHOOK_PATH} | ({"/metrics"} if METRICS_TOKEN else set())
 
-    EXEMPT = {"/health", "/.well-known/mcp/server-card.json"}
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
 
-    async def dispatch(self, request: Request, call_next):
-        if request.url.path in self.EXEMPT:
-            return await call_next(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.EXEMPT:
+            await self.app(scope, receive, send)
+            return
 
+        headers = Headers(scope=scope)
         api_key = (
-            request.query_params.get("api_key")
-            or request.headers.get("x-commune-api-key")
-            or request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+            QueryParams(scope.get("query_string", b"")).get("api_key")
+            or headers.get("x-commune-api-key")
+            or headers.get("authorization", "").removeprefix("Bearer ").strip()
         )
 
         if not api_key:
-            return JSONResponse(
+            response = JSONResponse(
                 {
                     "error": "api_key_required",
                     "message": "Pass your Commune API key via ?api_key=comm_... or X-Commune-Api-Key header.",
                 },
                 status_code=401,
             )
+            await response(scope, receive, send)
+            return
 
         token = _api_key_ctx.set(api_key)
         try:
-            return await call_next(request)
+            await self.app(scope, receive, send)
         finally:
             _api_key_ctx.reset(token)
 
@@ -79,57 +142,191 @@ class _ApiKeyMiddleware(BaseHTTPMiddleware):
 # ── Route handlers ────────────────────────────────────────────────────────────
 
 async def _health(request: Request):
-    return PlainTextResponse("ok")
+    # Always 200 while the process is up — upstream trouble shows as "degraded"
+    circuits = _breakers.snapshot()
+    degraded = any(c["state"] != "closed" for c in circuits.values())
+    return JSONResponse({
+        "status": "degraded" if degraded else "ok",
+        "circuits": circuits,
+        "sessions": request.app.state.session_manager.snapshot(),
+    })
+
+
+async def _metrics(request: Request):
+    given = request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+    if not hmac.compare_digest(given.encode(), METRICS_TOKEN.encode()):
+        return JSONResponse({"error": "unauthorized"}, status_code=401, headers={"WWW-Authenticate": "Bearer"})
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 
 async def _server_card(request: Request):
     return JSONResponse(_SERVER_CARD)
 
 
+async def _webhook(request: Request):
+    # Commune retries any non-2xx delivery, so only reject what a retry can't fix
+    too_large = JSONResponse({"error": "payload_too_large"}, status_code=413)
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > MAX_WEBHOOK_BYTES:
+        return too_large
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > MAX_WEBHOOK_BYTES:
+            return too_large
+    body = bytes(body)
+    try:
+        mailevents.verify_signature(
+            WEBHOOK_SECRETS,
+            body,
+            request.headers.get(mailevents.TIMESTAMP_HEADER),
+            request.headers.get(mailevents.SIGNATURE_HEADER),
+            WEBHOOK_TOLERANCE,
+        )
+    except mailevents.InvalidSignature as exc:
+        logger.warning("Rejected webhook delivery: %s", exc)
+        return JSONResponse({"error": "invalid_signature", "message": str(exc)}, status_code=401)
+    try:
+        payload = jsonlib.loads(body)
+    except Exception:
+        return JSONResponse({"error": "invalid_json"}, status_code=400)
+    if not isinstance(payload, dict):
+        return JSONResponse({"error": "invalid_json"}, status_code=400)
+    event = await ingest_mail_event(payload)
+    return JSONResponse({"ok": True, "accepted": event is not None})
+
+
 # ── App factory ───────────────────────────────────────────────────────────────
 
-def create_app() -> Starlette:
+def create_app(
+    stateless: Optional[bool] = None,
+    json_response: Optional[bool] = None,
+    event_store: Optional[eventstore.EventStoreBackend] = None,
+) -> Starlette:
     """
     Build the ASGI app.
 
     Mounts the MCP session manager at / so Smithery can POST to /?api_key=...
     Uses FastMCP's internal session manager directly so the lifespan (task group)
     is owned by this app — avoids the 'Task group is not initialized' error.
+
+    `stateless` and `json_response` default to COMMUNE_MCP_STATELESS and
+    COMMUNE_MCP_JSON_RESPONSE; `event_store` (for resumable SSE streams)
+    defaults to the backend chosen by COMMUNE_MCP_EVENT_STORE. Session idle
+    timeout and caps come from the COMMUNE_MCP_*SESSION* variables. The
+    webhook route is only mounted when COMMUNE_WEBHOOK_SECRET is set, and
+    /metrics only when COMMUNE_METRICS_TOKEN is.
     """
-    session_manager = StreamableHTTPSessionManager(
+    tracing.setup_tracing()
+    restrict_local_files()
+    events = event_store if event_store is not None else eventstore.from_env(DATA_DIR)
+    session_manager = SessionManager(
         app=mcp._mcp_server,
-        event_store=None,
-        json_response=False,
-        stateless=False,
+        events=events,
+        idle_timeout=SESSION_IDLE_TIMEOUT,
+        max_sessions=MAX_SESSIONS,
+        max_sessions_per_key=MAX_SESSIONS_PER_KEY,
+        key_fn=_api_key_ctx.get,
+        json_response=_env_flag("COMMUNE_MCP_JSON_RESPONSE") if json_response is None else json_response,
+        stateless=_env_flag("COMMUNE_MCP_STATELESS") if stateless is None else stateless,
     )
 
     async def _handle_mcp(scope, receive, send):
-        await session_manager.handle_request(scope, receive, send)
+        attributes = {"http.request.method": scope.get("method"), "url.path": scope.get("path")}
+        with tracing.span("mcp.request", attributes):
+            tracing.attach_to_scope(scope)
+            await session_manager.handle_request(scope, receive, send)
 
     @asynccontextmanager
     async def _lifespan(app: Starlette) -> AsyncIterator[None]:
-        async with session_manager.run():
-            yield
-
-    app = Starlette(
-        lifespan=_lifespan,
-        routes=[
-            Route("/health", _health),
-            Route("/.well-known/mcp/server-card.json", _server_card),
-            Mount("/", app=_handle_mcp),  # MCP at / — Smithery POSTs to /?api_key=...
-        ],
-    )
+        # Runs once per uvicorn worker: each gets its own client pool and caches
+        reset_worker_state()
+        open_http_client()
+        try:
+            async with session_manager.run():
+                yield
+        finally:
+            await close_http_client()
+            await close_worker_state()
+            if events is not None:
+                await events.close()
+
+    routes = [
+        Route("/health", _health),
+        Route("/.well-known/mcp/server-card.json", _server_card),
+    ]
+    if METRICS_TOKEN:
+        routes.append(Route("/metrics", _metrics))
+    if WEBHOOK_SECRETS:
+        enable_webhook_receiver()
+        routes.append(Route(WEBHOOK_PATH, _webhook, methods=["POST"]))
+    routes.append(Mount("/", app=_handle_mcp))  # MCP at / — Smithery POSTs to /?api_key=...
+
+    app = Starlette(lifespan=_lifespan, routes=routes)
+    app.state.session_manager = session_manager
     app.add_middleware(_ApiKeyMiddleware)
     return app
 
 
-def main():
-    port = int(os.environ.get("PORT", "8080"))
+def _parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    env = os.environ.get
+    parser = argparse.ArgumentParser(prog="commune-mcp-http", description="Commune MCP streamable HTTP server")
+    parser.add_argument("--host", default=env("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(env("PORT", "8080")))
+    parser.add_argument("--workers", type=int, default=int(env("COMMUNE_MCP_WORKERS", env("WEB_CONCURRENCY", "1"))),
+                        help="worker processes (default: 1)")
+    parser.add_argument("--loop", choices=["auto", "uvloop", "asyncio"], default=env("COMMUNE_MCP_LOOP", "auto"),
+                        help="event loop; auto uses uvloop when installed")
+    parser.add_argument("--http", choices=["auto", "httptools", "h11"], default=env("COMMUNE_MCP_HTTP_PARSER", "auto"),
+                        help="HTTP parser; auto uses httptools when installed")
+    parser.add_argument("--backlog", type=int, default=int(env("COMMUNE_MCP_BACKLOG", "2048")),
+                        help="listen socket backlog")
+    parser.add_argument("--timeout-keep-alive", type=int, default=int(env("COMMUNE_MCP_KEEP_ALIVE", "75")),
+                        help="seconds to keep idle client connections open; keep above the load balancer's idle timeout")
+    parser.add_argument("--limit-concurrency", type=int, default=int(env("COMMUNE_MCP_LIMIT_CONCURRENCY", "0")),
+                        help="max concurrent connections per worker before answering 503; 0 for no limit")
+    parser.add_argument("--timeout-graceful-shutdown", type=int,
+                        default=int(env("COMMUNE_MCP_GRACEFUL_SHUTDOWN", "30")),
+                        help="seconds to let in-flight requests finish on shutdown")
+    parser.add_argument("--stateless", action="store_true", default=_env_flag("COMMUNE_MCP_STATELESS"), help="see COMMUNE_MCP_STATELESS")
+    parser.add_argument("--json-response", action="store_true", default=_env_flag("COMMUNE_MCP_JSON_RESPONSE"),
+                        help="see COMMUNE_MCP_JSON_RESPONSE")
+    parser.add_argument("--log-level", default=env("COMMUNE_MCP_LOG_LEVEL", "info"))
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None):
+    args = _parse_args(argv)
+    # Spawned workers build the app themselves, in a fresh process, so pass the mode
+    # through the environment; with one worker the app is built here with the args
+    os.environ["COMMUNE_MCP_STATELESS"] = "1" if args.stateless else ""
+    os.environ["COMMUNE_MCP_JSON_RESPONSE"] = "1" if args.json_response else ""
+    if args.workers > 1 and not args.stateless:
+        logger.warning(
+            "Running %d workers without --stateless: an MCP session only exists in the worker that created it, "
+            "so requests landing on another worker fail", args.workers,
+        )
+    if args.loop == "uvloop" and importlib.util.find_spec("uvloop") is None:
+        raise SystemExit("--loop uvloop needs uvloop installed (pip install commune-mcp[server])")
+    if args.http == "httptools" and importlib.util.find_spec("httptools") is None:
+        raise SystemExit("--http httptools needs httptools installed (pip install commune-mcp[server])")
+
+    app: Any = "commune_mcp.server_http:create_app"
+    if args.workers <= 1:
+        app = functools.partial(create_app, stateless=args.stateless, json_response=args.json_response)
     uvicorn.run(
-        create_app(),
-        host="0.0.0.0",
-        port=port,
-        log_level="info",
+        app,
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=args.loop,
+        http=args.http,
+        backlog=args.backlog,
+        timeout_keep_alive=args.timeout_keep_alive,
+        limit_concurrency=args.limit_concurrency or None,
+        timeout_graceful_shutdown=args.timeout_graceful_shutdown,
+        log_level=args.log_level,
     )
 
 
@@ -0,0 +1,209 @@
+"""
+Bounded MCP session management for the streamable HTTP transport.
+
+The SDK's StreamableHTTPSessionManager keeps every stateful session until
+the process exits: agents that never send DELETE leave their session
+behind, and even terminated sessions stay in its table. `SessionManager`
+adds:
+
+    - idle eviction: sessions with no request for `idle_timeout` seconds
+    - a global cap and a per-API-key cap, evicting the least recently used
+      session (preferring ones with no request in progress)
+    - cleanup of terminated sessions
+    - a per-session view of a shared resumable event store
+
+Session counts and evictions are exported as Prometheus metrics.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Optional
+
+import anyio
+from mcp.server.streamable_http import MCP_SESSION_ID_HEADER, StreamableHTTPServerTransport
+from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+from starlette.datastructures import Headers
+from starlette.types import Receive, Scope, Send
+
+from commune_mcp.eventstore import EventStoreBackend, SessionEventStore
+from commune_mcp.metrics import REGISTRY, Counter, Gauge
+
+SESSIONS = REGISTRY.register(Gauge(
+    "commune_mcp_sessions", "Open stateful MCP sessions."))
+SESSION_EVICTIONS = REGISTRY.register(Counter(
+    "commune_mcp_session_evictions_total", "MCP sessions closed by the server, by reason.", ["reason"]))
+
+
+class _Session:
+    __slots__ = ("api_key", "last_active", "active_requests")
+
+    def __init__(self, api_key: str) -> None:
+        self.api_key = api_key
+        self.last_active = time.monotonic()
+        self.active_requests = 0
+
+
+class _SessionTable(OrderedDict):
+    """The SDK's session ID → transport table, kept in least-recently-used order."""
+
+    def __init__(self, manager: SessionManager) -> None:
+        super().__init__()
+        self.manager = manager
+        self.meta: dict[str, _Session] = {}
+        self.per_key: dict[str, int] = {}
+
+    def __setitem__(self, session_id: str, transport: StreamableHTTPServerTransport) -> None:
+        super().__setitem__(session_id, transport)
+        api_key = self.manager.key_fn()
+        self.meta[session_id] = _Session(api_key)
+        self.per_key[api_key] = self.per_key.get(api_key, 0) + 1
+        SESSIONS.set(value=len(self))
+        self.manager._enforce_caps(session_id)
+
+    def __delitem__(self, session_id: str) -> None:
+        super().__delitem__(session_id)
+        session = self.meta.pop(session_id)
+        remaining = self.per_key[session.api_key] - 1
+        if remaining:
+            self.per_key[session.api_key] = remaining
+        else:
+            del self.per_key[session.api_key]
+        SESSIONS.set(value=len(self))
+
+    def clear(self) -> None:
+        super().clear()
+        self.meta.clear()
+        self.per_key.clear()
+        SESSIONS.set(value=0)
+
+    def touch(self, session_id: str) -> None:
+        self.move_to_end(session_id)
+        self.meta[session_id].last_active = time.monotonic()
+
+
+# SDK internals SessionManager relies on (checked against mcp 1.26)
+_SDK_INTERNALS = ("_server_instances", "_task_group")
+
+
+class SessionManager(StreamableHTTPSessionManager):
+    """StreamableHTTPSessionManager with idle eviction and session caps.
+
+    `max_sessions` and `max_sessions_per_key` of 0 mean no cap; an
+    `idle_timeout` of 0 disables idle eviction. `key_fn` returns the API key
+    of the current request.
+    """
+
+    def __init__(
+        self,
+        *,
+        events: Optional[EventStoreBackend] = None,
+        idle_timeout: float = 1800.0,
+        max_sessions: int = 0,
+        max_sessions_per_key: int = 0,
+        key_fn: Callable[[], str] = lambda: "",
+        **kwargs: Any,
+    ) -> None:
+        self._events = events
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.max_sessions_per_key = max_sessions_per_key
+        self.key_fn = key_fn
+        super().__init__(**kwargs)
+        missing = [name for name in _SDK_INTERNALS if not hasattr(self, name)]
+        if not callable(getattr(StreamableHTTPSessionManager, "_handle_stateful_request", None)):
+            missing.append("_handle_stateful_request")
+        if missing or not isinstance(self._server_instances, dict):
+            raise RuntimeError(
+                "Unsupported mcp version: StreamableHTTPSessionManager no longer has "
+                f"{', '.join(missing) or '_server_instances as a dict'}; install mcp>=1.26,<2"
+            )
+        self._server_instances: _SessionTable = _SessionTable(self)
+
+    # The SDK reads `event_store` once per new transport, so serving it from a
+    # property lets sessions share a backend without sharing stream IDs.
+    @property
+    def event_store(self) -> Optional[SessionEventStore]:
+        return self._events.session() if self._events is not None else None
+
+    @event_store.setter
+    def event_store(self, value: Any) -> None:
+        pass  # set by the base __init__; sessions always get a view of _events
+
+    def snapshot(self) -> dict[str, Any]:
+        table = self._server_instances
+        return {
+            "active": len(table),
+            "api_keys": len(table.per_key),
+            "max": self.max_sessions or None,
+            "max_per_key": self.max_sessions_per_key or None,
+        }
+
+    @asynccontextmanager
+    async def run(self) -> AsyncIterator[None]:
+        async with super().run():
+            if not self.stateless and self.idle_timeout > 0 and self._task_group is not None:
+                self._task_group.start_soon(self._sweep_idle)
+            yield
+
+    async def _handle_stateful_request(self, scope: Scope, receive: Receive, send: Send) -> None:
+        table = self._server_instances
+        session_id = Headers(scope=scope).get(MCP_SESSION_ID_HEADER)
+        transport = table.get(session_id) if session_id else None
+        if transport is None:
+            await super()._handle_stateful_request(scope, receive, send)
+            return
+
+        table.touch(session_id)
+        session = table.meta[session_id]
+        session.active_requests += 1
+        try:
+            await super()._handle_stateful_request(scope, receive, send)
+        finally:
+            session.active_requests -= 1
+            if table.get(session_id) is transport:
+                if transport.is_terminated:  # DELETE from the client
+                    del table[session_id]
+                else:
+                    table.touch(session_id)  # idle time counts from the end of long streams
+
+    def _enforce_caps(self, new_id: str) -> None:
+        table = self._server_instances
+        api_key = table.meta[new_id].api_key
+        if self.max_sessions_per_key:
+            while table.per_key.get(api_key, 0) > self.max_sessions_per_key:
+                self._evict(self._lru(new_id, api_key), "key_cap")
+        if self.max_sessions:
+            while len(table) > self.max_sessions:
+                self._evict(self._lru(new_id), "cap")
+
+    def _lru(self, new_id: str, api_key: Optional[str] = None) -> str:
+        """Least recently used session other than `new_id`, idle ones first."""
+        table = self._server_instances
+        candidates = [
+            sid for sid in table  # oldest first
+            if sid != new_id and (api_key is None or table.meta[sid].api_key == api_key)
+        ]
+        return next((sid for sid in candidates if table.meta[sid].active_requests == 0), candidates[0])
+
+    def _evict(self, session_id: str, reason: str) -> None:
+        transport = self._server_instances[session_id]
+        del self._server_instances[session_id]
+        SESSION_EVICTIONS.inc(reason)
+        if self._task_group is not None and not transport.is_terminated:
+            self._task_group.start_soon(transport.terminate)
+
+    async def _sweep_idle(self) -> None:
+        interval = min(max(self.idle_timeout / 4, 1.0), 60.0)
+        while True:
+            await anyio.sleep(interval)
+            cutoff = time.monotonic() - self.idle_timeout
+            table = self._server_instances
+            for session_id, transport in list(table.items()):
+                session = table.meta[session_id]
+                if transport.is_terminated:
+                    del table[session_id]
+                elif session.active_requests == 0 and session.last_active < cutoff:
+                    self._evict(session_id, "idle")
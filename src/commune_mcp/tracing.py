@@ -0,0 +1,150 @@
+"""
+Optional OpenTelemetry tracing.
+
+Enable with COMMUNE_OTEL_EXPORTER:
+
+    console  — print finished spans to stderr (stdout carries stdio MCP traffic)
+    otlp     — export over OTLP/HTTP to a collector (OTEL_EXPORTER_OTLP_ENDPOINT,
+               default http://localhost:4318)
+    global   — use a tracer provider the host application already configured
+
+Requires `pip install commune-mcp[otel]`. When unset, or when OpenTelemetry
+is not installed, every helper here is a cheap no-op.
+
+Span layout: `mcp.request` per HTTP request → `mcp.tool <name>` per tool
+invocation → `commune.http <METHOD>` per upstream attempt (including
+retries and the x402 payment request).
+"""
+
+from __future__ import annotations
+
+import functools
+import logging
+import os
+import sys
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Iterator, Optional
+
+try:
+    from opentelemetry import context as otel_context
+    from opentelemetry import trace as otel_trace
+except ImportError:  # pragma: no cover - optional dependency
+    otel_context = None
+    otel_trace = None
+
+logger = logging.getLogger(__name__)
+
+# ASGI scope key holding the trace context of the enclosing MCP request
+SCOPE_KEY = "commune.otel_context"
+
+# Path segments that are followed by a resource ID
+_ID_PARENTS = frozenset({"domains", "inboxes", "threads", "attachments"})
+_NOT_IDS = frozenset({"send", "upload"})
+
+_tracer: Any = None
+
+
+def setup_tracing(exporter: Optional[str] = None) -> bool:
+    """Configure tracing from COMMUNE_OTEL_EXPORTER; returns True if enabled."""
+    global _tracer
+    exporter = (exporter if exporter is not None else os.environ.get("COMMUNE_OTEL_EXPORTER", "")).lower()
+    if not exporter or otel_trace is None:
+        if exporter:
+            logger.warning("COMMUNE_OTEL_EXPORTER is set but opentelemetry is not installed")
+        return False
+
+    if exporter != "global":
+        try:
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+        except ImportError:
+            logger.warning("COMMUNE_OTEL_EXPORTER=%s needs opentelemetry-sdk — tracing disabled", exporter)
+            return False
+
+        if exporter == "console":
+            span_exporter: Any = ConsoleSpanExporter(out=sys.stderr)
+        elif exporter == "otlp":
+            try:
+                from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            except ImportError:
+                logger.warning("COMMUNE_OTEL_EXPORTER=otlp needs opentelemetry-exporter-otlp-proto-http")
+                return False
+            span_exporter = OTLPSpanExporter()
+        else:
+            logger.warning("Unknown COMMUNE_OTEL_EXPORTER %r — expected console, otlp or global", exporter)
+            return False
+
+        provider = TracerProvider(
+            resource=Resource.create({"service.name": os.environ.get("OTEL_SERVICE_NAME", "commune-mcp")})
+        )
+        provider.add_span_processor(BatchSpanProcessor(span_exporter))
+        otel_trace.set_tracer_provider(provider)
+
+    _tracer = otel_trace.get_tracer("commune_mcp")
+    return True
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+@contextmanager
+def span(name: str, attributes: Optional[dict[str, Any]] = None, parent: Any = None) -> Iterator[Any]:
+    """Start a span (or do nothing when tracing is off). Exceptions mark it as errored."""
+    if _tracer is None:
+        yield None
+        return
+    with _tracer.start_as_current_span(name, context=parent, attributes=attributes) as s:
+        yield s
+
+
+def set_attributes(s: Any, attributes: dict[str, Any]) -> None:
+    if s is not None:
+        s.set_attributes({k: v for k, v in attributes.items() if v is not None})
+
+
+def path_template(path: str) -> str:
+    """Replace resource IDs in an API path, e.g. /v1/threads/{id}/messages."""
+    parts = path.split("/")
+    for i in range(1, len(parts)):
+        if parts[i - 1] in _ID_PARENTS and parts[i] and parts[i] not in _NOT_IDS:
+            parts[i] = "{id}"
+    return "/".join(parts)
+
+
+def attach_to_scope(scope: dict[str, Any]) -> None:
+    """Remember the current trace context on an ASGI scope for tool spans to join."""
+    if _tracer is not None:
+        scope.setdefault("state", {})[SCOPE_KEY] = otel_context.get_current()
+
+
+def context_from_scope(scope: Optional[dict[str, Any]]) -> Any:
+    if not scope:
+        return None
+    return scope.get("state", {}).get(SCOPE_KEY)
+
+
+def trace_tool(
+    name: str,
+    fn: Callable[..., Awaitable[Any]],
+    parent: Callable[[], Any] = lambda: None,
+) -> Callable[..., Awaitable[Any]]:
+    """Wrap an async tool function in an `mcp.tool <name>` span.
+
+    `parent` returns the trace context of the MCP request that carried the
+    call; in stateful HTTP sessions tools run in the session's task, so the
+    request context has to be looked up rather than inherited.
+    """
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if _tracer is None:
+            return await fn(*args, **kwargs)
+        with span(f"mcp.tool {name}", {"mcp.tool.name": name}, parent=parent()) as s:
+            result = await fn(*args, **kwargs)
+            if isinstance(result, str):
+                set_attributes(s, {"mcp.tool.result.size": len(result)})
+            return result
+
+    return wrapper
@@ -0,0 +1,269 @@
+"""
+Streaming attachment uploads.
+
+The Commune upload endpoint takes a JSON body with the file as a base64
+`content` string. Rather than building that string in memory, `FileBody`
+streams the JSON body straight from a file: it reads the file in chunks,
+base64-encodes each chunk and hashes it on the way through, so only one
+chunk is held in memory at a time.
+
+`UploadStore` lets a remote MCP client that has no file on the server
+send a file in pieces: each base64 chunk is decoded into a part file under
+COMMUNE_DATA_DIR, which is then uploaded with `FileBody`. Part files and
+their state are on disk, so the pieces of one upload may arrive at
+different workers.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator, Optional
+
+from commune_mcp import jsonlib
+
+# Bytes read per chunk; a multiple of 3 so base64 chunks concatenate cleanly
+CHUNK_SIZE = 3 * 64 * 1024
+
+
+def _read(path: str, offset: int, size: int) -> bytes:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.read(size)
+
+
+async def file_sha256(path: str, chunk_size: int = CHUNK_SIZE) -> str:
+    """SHA-256 of a file, read in chunks off the event loop."""
+    digest = hashlib.sha256()
+    offset = 0
+    while chunk := await asyncio.to_thread(_read, path, offset, chunk_size):
+        digest.update(chunk)
+        offset += len(chunk)
+    return digest.hexdigest()
+
+
+class FileBody:
+    """Factory for a streamed `{...fields, "content": "<base64>"}` JSON request body.
+
+    Each call returns a fresh async iterator over the body, so the request
+    can be retried. `sha256` is set once a full pass over the file finishes.
+    """
+
+    def __init__(self, path: str, fields: dict[str, Any], chunk_size: int = CHUNK_SIZE) -> None:
+        if chunk_size % 3:
+            raise ValueError("chunk_size must be a multiple of 3")
+        self.path = path
+        self.size = os.path.getsize(path)
+        self.chunk_size = chunk_size
+        head = jsonlib.dumps_bytes(fields)
+        self._prefix = head[:-1] + (b"," if fields else b"") + b'"content":"'
+        self._suffix = b'"}'
+        self.sha256: Optional[str] = None
+
+    @property
+    def content_length(self) -> int:
+        return len(self._prefix) + 4 * ((self.size + 2) // 3) + len(self._suffix)
+
+    def __call__(self) -> AsyncIterator[bytes]:
+        return self._stream()
+
+    async def _stream(self) -> AsyncIterator[bytes]:
+        digest = hashlib.sha256()
+        yield self._prefix
+        offset = 0
+        while offset < self.size:
+            chunk = await asyncio.to_thread(_read, self.path, offset, min(self.chunk_size, self.size - offset))
+            if not chunk:
+                raise OSError(f"{self.path} shrank while uploading")
+            digest.update(chunk)
+            offset += len(chunk)
+            yield base64.b64encode(chunk)
+        yield self._suffix
+        self.sha256 = digest.hexdigest()
+
+
+class UploadStore:
+    """Chunked uploads in progress, kept on disk so any worker can continue them.
+
+    Each upload is a row in `uploads.db` plus a `<upload_id>.part` file in
+    `directory`, scoped to a tenant (a hash of the API key, see
+    attachments). Appends and the claim made by a finishing upload run in
+    SQLite transactions, so workers sharing the directory never interleave
+    writes to one file. Uploads older than `ttl` seconds are removed by
+    `expire`.
+    """
+
+    def __init__(self, directory: str, ttl: float = 3600.0) -> None:
+        self.directory = directory
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(self.directory, exist_ok=True)
+            conn = sqlite3.connect(
+                os.path.join(self.directory, "uploads.db"), check_same_thread=False, isolation_level=None, timeout=30
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS uploads ("
+                " upload_id TEXT PRIMARY KEY, tenant TEXT NOT NULL, filename TEXT NOT NULL,"
+                " mime_type TEXT NOT NULL, size INTEGER NOT NULL DEFAULT 0,"
+                " sending INTEGER NOT NULL DEFAULT 0, created REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, fn: Any, *args: Any) -> Any:
+        def call() -> Any:
+            with self._lock:
+                return fn(self._db(), *args)
+
+        return await asyncio.to_thread(call)
+
+    def path(self, upload_id: str) -> str:
+        return os.path.join(self.directory, f"{upload_id}.part")
+
+    def _unlink(self, upload_id: str) -> None:
+        try:
+            os.unlink(self.path(upload_id))
+        except FileNotFoundError:
+            pass
+
+    async def begin(self, tenant: str, filename: str, mime_type: str, max_pending: int) -> Optional[str]:
+        """Start an upload and return its ID; None if the tenant already has `max_pending` open."""
+        upload_id = f"upl_{secrets.token_urlsafe(12)}"
+
+        def insert(db: sqlite3.Connection) -> Optional[str]:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                open_uploads = db.execute(
+                    "SELECT COUNT(*) FROM uploads WHERE tenant = ? AND created > ?", (tenant, time.time() - self.ttl)
+                ).fetchone()[0]
+                if open_uploads >= max_pending:
+                    db.execute("ROLLBACK")
+                    return None
+                open(self.path(upload_id), "wb").close()
+                db.execute(
+                    "INSERT INTO uploads (upload_id, tenant, filename, mime_type, created) VALUES (?, ?, ?, ?, ?)",
+                    (upload_id, tenant, filename, mime_type, time.time()),
+                )
+                db.execute("COMMIT")
+                return upload_id
+            except BaseException:
+                if db.in_transaction:
+                    db.execute("ROLLBACK")
+                raise
+
+        return await self._run(insert)
+
+    async def get(self, tenant: str, upload_id: str) -> Optional[dict[str, Any]]:
+        """The upload's filename, mime_type and size so far; None if unknown, expired or finishing."""
+
+        def query(db: sqlite3.Connection) -> Optional[dict[str, Any]]:
+            row = db.execute(
+                "SELECT filename, mime_type, size FROM uploads"
+                " WHERE upload_id = ? AND tenant = ? AND sending = 0 AND created > ?",
+                (upload_id, tenant, time.time() - self.ttl),
+            ).fetchone()
+            if row is None:
+                return None
+            return {"filename": row[0], "mime_type": row[1], "size": row[2], "path": self.path(upload_id)}
+
+        return await self._run(query)
+
+    async def append(self, tenant: str, upload_id: str, offset: int, data: bytes) -> bool:
+        """Write `data` at `offset`, which must be the size received so far.
+
+        Returns False if the upload is gone, expired, finishing, or got
+        another chunk since its size was read.
+        """
+
+        def write(db: sqlite3.Connection) -> bool:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute(
+                    "SELECT size FROM uploads WHERE upload_id = ? AND tenant = ? AND sending = 0 AND created > ?",
+                    (upload_id, tenant, time.time() - self.ttl),
+                ).fetchone()
+                if row is None or row[0] != offset:
+                    db.execute("ROLLBACK")
+                    return False
+                with open(self.path(upload_id), "r+b") as f:
+                    f.truncate(offset)  # drop anything left by an append that failed midway
+                    f.seek(offset)
+                    f.write(data)
+                db.execute("UPDATE uploads SET size = ? WHERE upload_id = ?", (offset + len(data), upload_id))
+                db.execute("COMMIT")
+                return True
+            except BaseException:
+                if db.in_transaction:
+                    db.execute("ROLLBACK")
+                raise
+
+        return await self._run(write)
+
+    async def claim(self, tenant: str, upload_id: str) -> Optional[dict[str, Any]]:
+        """Mark an upload as finishing, so no more chunks are accepted; None if it is not open."""
+        upload = await self.get(tenant, upload_id)
+        if upload is None:
+            return None
+
+        def update(db: sqlite3.Connection) -> bool:
+            return db.execute(
+                "UPDATE uploads SET sending = 1 WHERE upload_id = ? AND sending = 0 AND size = ? AND created > ?",
+                (upload_id, upload["size"], time.time() - self.ttl),
+            ).rowcount == 1
+
+        return upload if await self._run(update) else None
+
+    async def release(self, upload_id: str) -> None:
+        """Reopen a claimed upload whose send failed, so it can be retried."""
+
+        def update(db: sqlite3.Connection) -> None:
+            db.execute("UPDATE uploads SET sending = 0 WHERE upload_id = ?", (upload_id,))
+
+        await self._run(update)
+
+    async def discard(self, upload_id: str) -> None:
+        def delete(db: sqlite3.Connection) -> None:
+            db.execute("DELETE FROM uploads WHERE upload_id = ?", (upload_id,))
+            self._unlink(upload_id)
+
+        await self._run(delete)
+
+    async def expire(self) -> int:
+        """Remove uploads older than the TTL, plus part files no upload owns."""
+
+        def delete(db: sqlite3.Connection) -> int:
+            cutoff = time.time() - self.ttl
+            stale = [r[0] for r in db.execute("SELECT upload_id FROM uploads WHERE created <= ?", (cutoff,))]
+            db.execute("DELETE FROM uploads WHERE created <= ?", (cutoff,))
+            for upload_id in stale:
+                self._unlink(upload_id)
+            live = {r[0] for r in db.execute("SELECT upload_id FROM uploads")}
+            for name in os.listdir(self.directory):
+                upload_id = name.removesuffix(".part")
+                if name.endswith(".part") and upload_id not in live:
+                    try:
+                        if os.path.getmtime(self.path(upload_id)) <= cutoff:
+                            self._unlink(upload_id)
+                    except FileNotFoundError:
+                        pass
+            return len(stale)
+
+        return await self._run(delete)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
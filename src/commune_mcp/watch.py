@@ -0,0 +1,222 @@
+"""
+Shared inbox watchers for long-polling tools.
+
+A `Watcher` polls the newest threads of one inbox and records every thread
+that is new or has new activity since the previous poll. It polls only
+while someone is waiting on it, plus a short linger so back-to-back waits
+reuse it. Polling backs off while nothing changes (doubling from
+`min_interval` up to `max_interval`) and snaps back to `min_interval` on
+a change. `poke()` forces an immediate poll, e.g. when a webhook announces
+new mail.
+
+`WatcherPool` hands out one watcher per key, so any number of sessions
+waiting on the same inbox share a single upstream poller. A watcher keeps
+its thread versions after its task stops, so the first poll after a
+restart reports what changed in the gap. Cursors embed a per-process ID
+plus a sequence number shared by the pool.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import secrets
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from commune_mcp.metrics import REGISTRY, Counter, Gauge
+from commune_mcp.ratelimit import RateLimited
+
+WATCHERS = REGISTRY.register(Gauge(
+    "commune_mcp_inbox_watchers", "Inbox watchers currently polling upstream."))
+WATCH_POLLS = REGISTRY.register(Counter(
+    "commune_mcp_inbox_watch_polls_total", "Upstream polls made by inbox watchers, by outcome.", ["outcome"]))
+
+Poll = Callable[[], Awaitable[list[dict[str, Any]]]]
+
+
+class Watcher:
+    """Polls one inbox while it has waiters and keeps a log of changed threads."""
+
+    def __init__(self, pool: WatcherPool, poll: Poll) -> None:
+        self.pool = pool
+        self.poll = poll
+        self.versions: Optional[dict[str, tuple[Any, Any]]] = None  # thread_id → (last_message_at, message_count)
+        self.changes: deque[tuple[int, dict[str, Any]]] = deque(maxlen=pool.max_changes)
+        self.interval = pool.min_interval
+        self.error: Optional[Exception] = None
+        self.waiters = 0
+        self.last_waiter = time.monotonic()
+        self._task: Optional[asyncio.Task[None]] = None
+        self._ready = asyncio.Event()
+        self._changed = asyncio.Event()
+        self._wake = asyncio.Event()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._ready = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+
+    def poke(self) -> None:
+        self.interval = self.pool.min_interval
+        self._wake.set()
+
+    def _diff(self, threads: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        first = self.versions is None
+        versions = self.versions if self.versions is not None else {}
+        changed = []
+        for thread in threads:
+            thread_id = thread.get("thread_id")
+            if not thread_id:
+                continue
+            version = (thread.get("last_message_at"), thread.get("message_count"))
+            before = versions.get(thread_id)
+            versions[thread_id] = version
+            if first or before == version:
+                continue
+            change = "new_thread" if before is None else "new_message"
+            delta = {"change": change, **thread}
+            if before is not None and isinstance(version[1], int) and isinstance(before[1], int):
+                delta["new_messages"] = version[1] - before[1]
+            changed.append(delta)
+        self.versions = versions
+        return changed
+
+    async def _run(self) -> None:
+        WATCHERS.inc()
+        try:
+            while True:
+                self._wake.clear()
+                try:
+                    threads = await self.poll()
+                except RateLimited as exc:
+                    WATCH_POLLS.inc("rate_limited")
+                    delay = max(exc.retry_after, self.interval)
+                except Exception as exc:
+                    WATCH_POLLS.inc("error")
+                    self.error = exc
+                    self.interval = self.pool.max_interval
+                    delay = self.interval
+                else:
+                    WATCH_POLLS.inc("ok")
+                    self.error = None
+                    changed = self._diff(threads)
+                    if changed:
+                        for delta in changed:
+                            self.changes.append((self.pool.next_seq(), delta))
+                        self._changed.set()
+                        self._changed = asyncio.Event()
+                        self.interval = self.pool.min_interval
+                    else:
+                        self.interval = min(self.interval * 2, self.pool.max_interval)
+                    delay = self.interval
+                self._ready.set()
+
+                if self.waiters == 0 and time.monotonic() - self.last_waiter > self.pool.linger:
+                    return
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            WATCHERS.dec()
+            self._ready.set()
+
+    async def wait(self, cursor: Optional[str], timeout: float) -> tuple[list[dict[str, Any]], str]:
+        """Threads changed after `cursor`, waiting up to `timeout` seconds for one.
+
+        Without a cursor, only changes from now on count. Raises the poll
+        error if the watcher could not establish a baseline.
+        """
+        self.waiters += 1
+        try:
+            self.start()
+            deadline = time.monotonic() + timeout
+            if self.versions is None:
+                try:
+                    await asyncio.wait_for(self._ready.wait(), timeout)
+                except asyncio.TimeoutError:
+                    return [], self.pool.cursor()
+                if self.versions is None and self.error is not None:
+                    raise self.error
+            after = self.pool.position(cursor)
+            while True:
+                latest: dict[str, dict[str, Any]] = {}
+                for seq, delta in self.changes:
+                    if seq > after:
+                        latest.pop(delta["thread_id"], None)  # keep the newest, in order
+                        latest[delta["thread_id"]] = delta
+                remaining = deadline - time.monotonic()
+                if latest or remaining <= 0:
+                    return list(latest.values()), self.pool.cursor()
+                changed = self._changed
+                try:
+                    await asyncio.wait_for(changed.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.waiters -= 1
+            self.last_waiter = time.monotonic()
+
+
+class WatcherPool:
+    """One `Watcher` per key, least recently used dropped beyond `max_watchers`."""
+
+    def __init__(
+        self,
+        min_interval: float = 2.0,
+        max_interval: float = 30.0,
+        linger: float = 60.0,
+        max_changes: int = 200,
+        max_watchers: int = 10000,
+    ) -> None:
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.linger = linger
+        self.max_changes = max_changes
+        self.max_watchers = max_watchers
+        self._epoch = secrets.token_hex(4)
+        self._seq = 0
+        self._watchers: OrderedDict[Hashable, Watcher] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._watchers)
+
+    def next_seq(self) -> int:
+        self._seq += 1
+        return self._seq
+
+    def cursor(self) -> str:
+        return f"{self._epoch}-{self._seq}"
+
+    def position(self, cursor: Optional[str]) -> int:
+        if cursor is None:
+            return self._seq
+        epoch, _, seq = cursor.partition("-")
+        if epoch != self._epoch or not seq.isdigit():
+            return 0  # from another process: report whatever this one has seen
+        return int(seq)
+
+    def get(self, key: Hashable, poll: Poll) -> Watcher:
+        watcher = self._watchers.get(key)
+        if watcher is None:
+            watcher = self._watchers[key] = Watcher(self, poll)
+            while len(self._watchers) > self.max_watchers:
+                _, old = self._watchers.popitem(last=False)
+                if old._task is not None:
+                    old._task.cancel()
+        else:
+            self._watchers.move_to_end(key)
+        return watcher
+
+    def poke(self, match: Callable[[Hashable], bool]) -> int:
+        """Make every running watcher whose key matches poll now."""
+        poked = 0
+        for key, watcher in self._watchers.items():
+            if match(key) and watcher._task is not None and not watcher._task.done():
+                watcher.poke()
+                poked += 1
+        return poked
+
+    def clear(self) -> None:
+        self._watchers.clear()